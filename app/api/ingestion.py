@@ -1,182 +1,285 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends
-import io
-import PyPDF2
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    UploadFile,
+    File,
+    Form,
+    Depends,
+    Response,
+)
 from pathlib import Path
-from app.models.schemas import Document_INGESTION_RESPONSE
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
+from app.models.schemas import Ingestion_Job_Response, Ingestion_Job_Status
 from app.logger import logger
 from app.config import settings
-from app.models.schemas import Fixed_length_Chunk_Config, Semantic_Chunk_Config
-from app.services.chunking import get_chunker
-from app.services.embed import get_embedding_client
-from app.services.vectore_store_adapters import get_vector_store
-from uuid import uuid4
+from app.services.ingestion_jobs import (
+    Ingestion_Job,
+    Ingestion_Job_Store,
+    get_job_store,
+)
+from app.services.ingestion_pipeline import build_chunking_config, embedding_model_name
 from app.services.meta_data import Meta_Data_Store
+from app.services.answer_cache import Answer_Cache, get_answer_cache
+from app.services.vectore_store_adapters import Base_Vector_Store, get_vector_store
+from app.services.upload_storage import Stored_Upload, Upload_Too_Large, save_upload
+from uuid import UUID, uuid4
 
 
 router = APIRouter(prefix="/api", tags=["ingestion"])
 
 
-def extract_text_from_pdf(file_content: bytes) -> str:
-    pdf_file = io.BytesIO(file_content)
-    pdf_reader = PyPDF2.PdfReader(pdf_file)
-    text = ""
-    for page in pdf_reader.pages:
-        text += page.extract_text() + "\n"
-    return text.strip()
+async def store_upload(file: UploadFile) -> tuple[UUID, Stored_Upload]:
+    # oversized bodies were already rejected by Upload_Limit_Middleware
+    file_extension = Path(file.filename).suffix.lower()
+    if file_extension not in settings.allowed_extensions:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File type {file_extension} not allowed. Allowed types: {settings.allowed_extensions}",
+        )
 
+    upload_dir = Path(settings.upload_directory)
+    upload_dir.mkdir(parents=True, exist_ok=True)
 
-def extract_text_from_text(file_content: bytes) -> str:
-    return file_content.decode("utf-8")
+    file_id = uuid4()
+    try:
+        stored = await save_upload(file, upload_dir / f"{file_id}{file_extension}")
+    except Upload_Too_Large as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.info(
+        f"Stored file: {file.filename} ({stored.file_size} bytes, sha256 {stored.content_hash[:12]})"
+    )
+    return file_id, stored
 
 
-@router.post("/ingest", response_model=Document_INGESTION_RESPONSE)
+@router.post("/ingest", response_model=Ingestion_Job_Response, status_code=202)
 async def ingest_document(
+    response: Response,
     file: UploadFile = File(..., description="PDF or TXT file to ingest"),
     chunking_type: str = Form(
-        "simple", description="Chunking strategy: 'simple' or 'semantic'"
+        "simple",
+        description="Chunking strategy: 'fixed_len', 'semantic' or 'content_defined'",
+    ),
+    chunk_size: int = Form(
+        500, description="Chunk size (average size for content_defined)"
     ),
-    chunk_size: int = Form(500, description="Chunk size for simple chunking"),
     chunk_overlap: int = Form(50, description="Chunk overlap for simple chunking"),
     split_by: str = Form(
         "sentence",
         description="Split by 'sentence' or 'paragraph' for semantic chunking",
     ),
     max_chunk_size: int = Form(
-        1000, description="Max chunk size for semantic chunking"
+        1000, description="Max chunk size for semantic/content_defined chunking"
+    ),
+    min_chunk_size: int = Form(
+        200, description="Min chunk size for content_defined chunking"
     ),
     db: AsyncSession = Depends(get_db),
+    job_store: Ingestion_Job_Store = Depends(get_job_store),
 ):
     try:
-        file_extension = Path(file.filename).suffix.lower()
-        if file_extension not in settings.allowed_extensions:
-            raise HTTPException(
-                status_code=400,
-                detail=f"File type {file_extension} not allowed. Allowed types: {settings.allowed_extensions}",
+        try:
+            chunking_config = build_chunking_config(
+                chunking_type,
+                chunk_size,
+                chunk_overlap,
+                split_by,
+                max_chunk_size,
+                min_chunk_size,
             )
-        file_content = await file.read()
-        file_size = len(file_content)
+        except ValidationError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid chunking config: {e}")
 
-        if file_size > settings.max_upload_size:
-            raise HTTPException(
-                status_code=400,
-                detail=f"File size exceeds maximum allowed size of {settings.max_upload_size} bytes",
-            )
-        logger.info(f"Processing file: {file.filename} ({file_size} bytes)")
-        # Extract text based on file type
-        if file_extension == ".pdf":
-            text = extract_text_from_pdf(file_content)
-        elif file_extension == ".txt":
-            text = extract_text_from_text(file_content)
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported file type")
-
-        if not text or not text.strip():
-            raise HTTPException(
-                status_code=400, detail="No text could be extracted from the file"
-            )
+        file_id, stored = await store_upload(file)
 
-        logger.info(f"Extracted {len(text)} characters from {file.filename}")
+        job = Ingestion_Job(
+            job_id=file_id,
+            filename=file.filename,
+            file_path=stored.file_path,
+            file_size=stored.file_size,
+            content_hash=stored.content_hash,
+            chunking_type=chunking_type,
+            chunking_config=chunking_config.model_dump(),
+        )
 
-        if chunking_type == "fixed_len":
-            chunking_config = Fixed_length_Chunk_Config(
-                chunk_size=chunk_size, chunk_overlap=chunk_overlap
-            )
-        else:
-            chunking_config = Semantic_Chunk_Config(
-                split_by=split_by, max_chunk_size=max_chunk_size
+        # identical bytes with the same chunking config: reuse the document
+        existing_document = await Meta_Data_Store(db).get_document_by_content_hash(
+            stored.content_hash,
+            chunking_type,
+            job.chunking_config,
+            embedding_model_name(),
+        )
+        if existing_document is not None:
+            Path(stored.file_path).unlink(missing_ok=True)
+            job.file_path = existing_document.file_path or ""
+            job.status, job.stage, job.progress = "completed", "done", 1.0
+            job.document_id = existing_document.id
+            job.total_chunks = existing_document.total_chunks
+            await job_store.save_job(job)
+            logger.info(
+                f"{file.filename} is identical to document {existing_document.id}"
             )
-        chunker = get_chunker(chunking_config)
-        chunks = chunker.chunk(text)
-        if not chunks:
-            raise HTTPException(
-                status_code=400, detail="No chunks were created from the text"
+            response.status_code = 200
+            return Ingestion_Job_Response(
+                job_id=job.job_id,
+                filename=job.filename,
+                status=job.status,
+                document_id=existing_document.id,
+                created_at=job.created_at,
+                message="Identical document already ingested",
             )
-        logger.info(f"Created {len(chunks)} chunks")
 
-        embedding_client = get_embedding_client()
-        vector_store = get_vector_store()
-        metadata_store = Meta_Data_Store(db)
+        # the same upload is already being ingested: follow that job instead
+        in_flight = await job_store.claim_upload(job)
+        if in_flight is not None:
+            Path(stored.file_path).unlink(missing_ok=True)
+            logger.info(
+                f"{file.filename} is already being ingested by job {in_flight.job_id}"
+            )
+            return Ingestion_Job_Response(
+                job_id=in_flight.job_id,
+                filename=in_flight.filename,
+                status=in_flight.status,
+                created_at=in_flight.created_at,
+                message="Identical document is already queued for ingestion",
+            )
 
-        await vector_store.initialize()
+        try:
+            job = await job_store.enqueue(job)
+        except Exception:
+            await job_store.release_upload(job)
+            raise
 
-        upload_dir = Path(settings.upload_directory)
-        upload_dir.mkdir(parents=True, exist_ok=True)
+        return Ingestion_Job_Response(
+            job_id=job.job_id,
+            filename=job.filename,
+            status=job.status,
+            created_at=job.created_at,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error queuing document: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500, detail=f"Failed to queue document: {str(e)}"
+        )
 
-        file_id = uuid4()
-        file_path = upload_dir / f"{file_id}{file_extension}"
 
-        with open(file_path, "wb") as f:
-            f.write(file_content)
+@router.put(
+    "/documents/{document_id}", response_model=Ingestion_Job_Response, status_code=202
+)
+async def update_document(
+    document_id: UUID,
+    file: UploadFile = File(..., description="New version of the document"),
+    db: AsyncSession = Depends(get_db),
+    job_store: Ingestion_Job_Store = Depends(get_job_store),
+):
+    document = await Meta_Data_Store(db).get_document_by_id(document_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Document not found")
 
-        if settings.embedding_provider == "cohere":
-            embedding_model = "cohere-embed"
-        else:
-            embedding_model = f"{settings.embedding_provider}-embed"
+    try:
+        file_id, stored = await store_upload(file)
 
-        document = await metadata_store.create_document(
+        job = Ingestion_Job(
+            job_id=file_id,
             filename=file.filename,
-            file_path=str(file_path),
-            file_size=file_size,
-            file_type=file_extension.lstrip("."),
-            total_chunks=len(chunks),
-            chunking_strategy=chunking_type,
-            chunking_config=chunking_config.model_dump(),
-            vector_store_type=settings.vector_store_type,
-            embedding_model=embedding_model,
-        )
-        logger.info("Generating embeddings...")
-        embeddings = await embedding_client.embed_list_of_text(
-            chunks, input_type="search_document"
+            file_path=stored.file_path,
+            file_size=stored.file_size,
+            content_hash=stored.content_hash,
+            chunking_type=document.chunking_strategy,
+            chunking_config=document.chunking_config or {},
+            operation="update",
+            document_id=document_id,
         )
-        vectors = []
-        for idx, (chunk_text, embedding) in enumerate(zip(chunks, embeddings)):
-            chunk_id = f"{document.id}_{idx}"
-            vector_id = f"vec_{chunk_id}"
-
-            await metadata_store.create_chunk(
-                chunk_id=chunk_id,
-                document_id=document.id,
-                chunk_index=idx,
-                chunk_text=chunk_text,
-                vector_id=vector_id,
-                metadata={
-                    "filename": file.filename,
-                    "document_id": str(document.id),
-                },
-            )
-            vectors.append(
-                (
-                    vector_id,
-                    embedding,
-                    {
-                        "chunk_id": chunk_id,
-                        "chunk_text": chunk_text,
-                        "filename": file.filename,
-                        "chunk_index": idx,
-                        "document_id": str(document.id),
-                    },
-                )
+
+        # updates of one document would race on the same chunks and vectors
+        in_flight = await job_store.claim_document(job)
+        if in_flight is not None:
+            Path(stored.file_path).unlink(missing_ok=True)
+            raise HTTPException(
+                status_code=409,
+                detail=f"Document {document_id} is already being updated by job {in_flight.job_id}",
             )
-            logger.info("Storing vectors in Pinecone...")
-        await vector_store.upsert(vectors)
 
-        logger.info(f"Successfully ingested document {document.id}")
+        try:
+            job = await job_store.enqueue(job)
+        except Exception:
+            await job_store.release_document(job)
+            raise
 
-        return Document_INGESTION_RESPONSE(
-            document_id=document.id,
-            filename=file.filename,
-            total_chunks=len(chunks),
-            chunking_strategy=chunking_type,
-            vector_store="pinecone",
-            created_at=document.created_at,
-            message="Document ingested successfully",
+        return Ingestion_Job_Response(
+            job_id=job.job_id,
+            filename=job.filename,
+            status=job.status,
+            document_id=document_id,
+            created_at=job.created_at,
+            message="Document update queued",
         )
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error ingesting document: {e}", exc_info=True)
+        logger.error(f"Error queuing document update: {e}", exc_info=True)
         raise HTTPException(
-            status_code=500, detail=f"Failed to ingest document: {str(e)}"
+            status_code=500, detail=f"Failed to queue document update: {str(e)}"
         )
+
+
+@router.delete("/documents/{document_id}", status_code=204)
+async def delete_document(
+    document_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    vector_store: Base_Vector_Store = Depends(get_vector_store),
+    answer_cache: Answer_Cache = Depends(get_answer_cache),
+):
+    metadata_store = Meta_Data_Store(db)
+    document = await metadata_store.get_document_by_id(document_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    try:
+        chunks = await metadata_store.get_chunks_by_document_id(document_id)
+        # rows go first: if the vector delete fails the session rolls back
+        await metadata_store.delete_document(document_id)
+        await db.flush()
+        if chunks:
+            await vector_store.delete([chunk.vector_id for chunk in chunks])
+    except Exception as e:
+        logger.error(f"Error deleting document {document_id}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500, detail=f"Failed to delete document: {str(e)}"
+        )
+
+    try:
+        await answer_cache.invalidate_documents([document_id])
+    except Exception as e:
+        logger.warning(f"Failed to invalidate answers of {document_id}: {e}")
+
+    if document.file_path:
+        Path(document.file_path).unlink(missing_ok=True)
+    logger.info(f"Deleted document {document_id} with {len(chunks)} chunks")
+    return Response(status_code=204)
+
+
+@router.get("/ingest/{job_id}", response_model=Ingestion_Job_Status)
+async def get_ingestion_job(
+    job_id: UUID,
+    job_store: Ingestion_Job_Store = Depends(get_job_store),
+):
+    job = await job_store.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+
+    return Ingestion_Job_Status(
+        job_id=job.job_id,
+        filename=job.filename,
+        status=job.status,
+        stage=job.stage,
+        progress=job.progress,
+        error=job.error,
+        document_id=job.document_id,
+        total_chunks=job.total_chunks,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+    )
@@ -1,6 +1,9 @@
-from typing import List
+import asyncio
+import json
+from typing import Any, AsyncIterator, List, Optional, Tuple
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.schemas import (
@@ -9,131 +12,234 @@ from app.models.schemas import (
     RetrievedContext,
     BookingResponse,
     BookingListResponse,
+    Booking_Info,
 )
-from app.services.embed import get_embedding_client
-from app.services.vectore_store_adapters import get_vector_store
-from app.services.chat_history import get_chat_memory, ChatMemoryService
-from app.services.LLM import get_llm_client
+from app.models.db_models import InterviewBooking
+from app.services.embed import get_embedding_client, Base_Embedding
+from app.services.vectore_store_adapters import get_vector_store, Base_Vector_Store
+from app.services.chat_history import get_chat_memory, ChatMemoryService, Chat_Record
+from app.services.LLM import get_llm_client, LLM_Client
+from app.services.answer_cache import get_answer_cache, Answer_Cache
 from app.services.meta_data import Meta_Data_Store
-from app.db.session import get_db
+from app.db.session import get_db, AsyncSessionLocal
 from app.config import settings
 from app.logger import logger
-
+from app.metrics import ANSWER_CACHE_REQUESTS, timed, timed_stage
 
 router = APIRouter(prefix="/api", tags=["rag"])
 
 
+async def retrieve_contexts(
+    embedding_client: Base_Embedding,
+    vector_store: Base_Vector_Store,
+    query: str,
+    top_k: int,
+) -> Tuple[List[RetrievedContext], str]:
+    logger.info("Generating query embedding...")
+    with timed_stage("chat", "embed_query"):
+        query_embedding = await embedding_client.embed_text(
+            query, input_type="search_query"
+        )
+
+    logger.info(f"Searching for top {top_k} similar vectors...")
+    with timed_stage("chat", "vector_search"):
+        search_results = await vector_store.search(
+            query_vector=query_embedding, top_k=top_k
+        )
+
+    filtered_results = [
+        result
+        for result in search_results
+        if result.score >= settings.similarity_threshold
+    ]
+
+    logger.info(
+        f"Found {len(filtered_results)} results above threshold {settings.similarity_threshold}"
+    )
+
+    retrieved_contexts = [
+        RetrievedContext(
+            chunk_id=result.metadata.get("chunk_id", ""),
+            chunk_text=result.metadata.get("chunk_text", ""),
+            filename=result.metadata.get("filename", ""),
+            similarity_score=result.score,
+            metadata=result.metadata,
+        )
+        for result in filtered_results
+    ]
+    context_text = "".join(
+        f"\n\n{result.metadata.get('chunk_text', '')}" for result in filtered_results
+    )
+
+    if not context_text.strip():
+        context_text = "No relevant context found in the document database."
+
+    return retrieved_contexts, context_text
+
+
+async def lookup_cached_answer(
+    answer_cache: Answer_Cache,
+    query: str,
+    chat_history: List[Chat_Record],
+    retrieved_contexts: List[RetrievedContext],
+) -> Tuple[bool, Optional[str]]:
+    """Returns (cacheable, cached answer); turns with history bypass the cache."""
+    if not settings.answer_cache_enabled or chat_history:
+        ANSWER_CACHE_REQUESTS.labels("bypass").inc()
+        return False, None
+
+    with timed_stage("chat", "answer_cache"):
+        answer = await answer_cache.get(query, retrieved_contexts)
+    ANSWER_CACHE_REQUESTS.labels("miss" if answer is None else "hit").inc()
+    if answer is not None:
+        logger.info("Serving cached answer")
+    return True, answer
+
+
+async def persist_answer(
+    chat_memory: ChatMemoryService, session_id: UUID, answer: str
+) -> None:
+    # the user's query was appended by start_turn when history was read
+    try:
+        with timed_stage("chat", "history_write"):
+            await chat_memory.add_message(
+                session_id=session_id, role="assistant", content=answer
+            )
+    except Exception as e:
+        logger.error(f"Failed to persist chat turn for session {session_id}: {e}")
+
+
+async def create_booking_if_complete(
+    metadata_store: Meta_Data_Store,
+    booking_info: Optional[Booking_Info],
+    session_id: UUID,
+) -> Optional[InterviewBooking]:
+    if not (
+        booking_info
+        and booking_info.name
+        and booking_info.email
+        and booking_info.date
+        and booking_info.time
+    ):
+        return None
+
+    logger.info(f"Booking detected for {booking_info.name}")
+    with timed_stage("chat", "db_write"):
+        return await metadata_store.create_booking(
+            name=booking_info.name,
+            email=booking_info.email,
+            date=booking_info.date,
+            time=booking_info.time,
+            session_id=session_id,
+            additional_notes=booking_info.additional_notes,
+        )
+
+
+def booking_confirmation(booking_info: Booking_Info, booking_id: UUID) -> str:
+    return (
+        f"\n\n✅ Interview booking created successfully!\n"
+        f"- Name: {booking_info.name}\n"
+        f"- Email: {booking_info.email}\n"
+        f"- Date: {booking_info.date}\n"
+        f"- Time: {booking_info.time}\n"
+        f"- Booking ID: {booking_id}"
+    )
+
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     chat_memory: ChatMemoryService = Depends(get_chat_memory),
+    embedding_client: Base_Embedding = Depends(get_embedding_client),
+    vector_store: Base_Vector_Store = Depends(get_vector_store),
+    llm_client: LLM_Client = Depends(get_llm_client),
+    answer_cache: Answer_Cache = Depends(get_answer_cache),
 ):
     try:
         logger.info(f"Processing chat request for session {request.session_id}")
 
-        embedding_client = get_embedding_client()
-        vector_store = get_vector_store()
-        llm_client = get_llm_client()
         metadata_store = Meta_Data_Store(db)
 
-        await vector_store.initialize()
-
-        chat_history = await chat_memory.get_recent_messages(
-            session_id=request.session_id, count=10
-        )
-
-        await chat_memory.add_message(
-            session_id=request.session_id, role="user", content=request.query
-        )
-
-        logger.info("Generating query embedding...")
-        query_embedding = await embedding_client.embed_text(
-            request.query, input_type="search_query"
-        )
-
-        logger.info(f"Searching for top {request.top_k} similar vectors...")
-        search_results = await vector_store.search(
-            query_vector=query_embedding, top_k=request.top_k
-        )
-
-        filtered_results = [
-            result
-            for result in search_results
-            if result.score >= settings.similarity_threshold
-        ]
+        # Booking extraction only needs the query, and history loading is
+        # independent of retrieval, so all three start at once. The answer
+        # waits for history and context; booking extraction overlaps it.
+        try:
+            async with asyncio.TaskGroup() as tg:
+                booking_task = tg.create_task(
+                    timed(
+                        "chat",
+                        "booking_extraction",
+                        llm_client.extract_booking_info(request.query),
+                    )
+                )
+                history_task = tg.create_task(
+                    timed(
+                        "chat",
+                        "history_read",
+                        chat_memory.start_turn(
+                            session_id=request.session_id, query=request.query, count=10
+                        ),
+                    )
+                )
+                retrieval_task = tg.create_task(
+                    retrieve_contexts(
+                        embedding_client, vector_store, request.query, request.top_k
+                    )
+                )
 
-        logger.info(
-            f"Found {len(filtered_results)} results above threshold {settings.similarity_threshold}"
-        )
+                chat_history = await history_task
+                retrieved_contexts, context_text = await retrieval_task
 
-        retrieved_contexts = []
-        context_text = ""
-
-        for result in filtered_results:
-            retrieved_contexts.append(
-                RetrievedContext(
-                    chunk_id=result.metadata.get("chunk_id", ""),
-                    chunk_text=result.metadata.get("chunk_text", ""),
-                    filename=result.metadata.get("filename", ""),
-                    similarity_score=result.score,
-                    metadata=result.metadata,
+                cacheable, answer = await lookup_cached_answer(
+                    answer_cache, request.query, chat_history, retrieved_contexts
                 )
+                cache_hit = answer is not None
+                if cache_hit:
+                    # don't hold a cached answer back for the booking LLM call
+                    booking_task.cancel()
+                else:
+                    logger.info("Generating LLM response...")
+                    with timed_stage("chat", "llm_generate"):
+                        answer = await llm_client.generate_response(
+                            query=request.query,
+                            context=context_text,
+                            chat_history=chat_history,
+                        )
+                    if cacheable:
+                        background_tasks.add_task(
+                            answer_cache.set, request.query, retrieved_contexts, answer
+                        )
+        except ExceptionGroup as eg:
+            raise eg.exceptions[0] from None
+
+        if cache_hit and booking_task.cancelled():
+            booking_info = await llm_client.extract_booking_info(
+                request.query, llm_fallback=False
             )
-            context_text += f"\n\n{result.metadata.get('chunk_text', '')}"
+        else:
+            booking_info = booking_task.result()
 
-        if not context_text.strip():
-            context_text = "No relevant context found in the document database."
-
-        logger.info("Generating LLM response...")
-        answer = await llm_client.generate_response(
-            query=request.query, context=context_text, chat_history=chat_history
-        )
-
-        await chat_memory.add_message(
-            session_id=request.session_id, role="assistant", content=answer
+        # Redis writes happen after the response is sent
+        background_tasks.add_task(
+            persist_answer, chat_memory, request.session_id, answer
         )
 
         booking_detected = False
         booking_id = None
 
-        booking_info = await llm_client.extract_booking_info(request.query)
-
-        if booking_info and any(
-            [
-                booking_info.name,
-                booking_info.email,
-                booking_info.date,
-                booking_info.time,
-            ]
-        ):
-            if (
-                booking_info.name
-                and booking_info.email
-                and booking_info.date
-                and booking_info.time
-            ):
-                logger.info(f"Booking detected for {booking_info.name}")
-                booking_detected = True
-
-                booking = await metadata_store.create_booking(
-                    name=booking_info.name,
-                    email=booking_info.email,
-                    date=booking_info.date,
-                    time=booking_info.time,
-                    session_id=request.session_id,
-                    additional_notes=booking_info.additional_notes,
-                )
-                booking_id = booking.id
-
-                answer += (
-                    f"\n\n✅ Interview booking created successfully!\n"
-                    f"- Name: {booking_info.name}\n"
-                    f"- Email: {booking_info.email}\n"
-                    f"- Date: {booking_info.date}\n"
-                    f"- Time: {booking_info.time}\n"
-                    f"- Booking ID: {booking_id}"
-                )
+        booking = await create_booking_if_complete(
+            metadata_store, booking_info, request.session_id
+        )
+        if booking:
+            booking_detected = True
+            booking_id = booking.id
+            answer += booking_confirmation(booking_info, booking_id)
 
         return ChatResponse(
             session_id=request.session_id,
@@ -151,6 +257,122 @@ async def chat(
         )
 
 
+@router.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    chat_memory: ChatMemoryService = Depends(get_chat_memory),
+    embedding_client: Base_Embedding = Depends(get_embedding_client),
+    vector_store: Base_Vector_Store = Depends(get_vector_store),
+    llm_client: LLM_Client = Depends(get_llm_client),
+    answer_cache: Answer_Cache = Depends(get_answer_cache),
+):
+    """
+    Server-sent events: a ``contexts`` event with the retrieved chunks, one
+    ``token`` event per answer delta, then ``done`` with booking info and
+    IDs (or ``error`` if the turn fails).
+    """
+
+    async def event_stream() -> AsyncIterator[str]:
+        logger.info(f"Streaming chat request for session {request.session_id}")
+        booking_task = asyncio.create_task(
+            timed(
+                "chat",
+                "booking_extraction",
+                llm_client.extract_booking_info(request.query),
+            )
+        )
+        parts: List[str] = []
+        try:
+            chat_history, (retrieved_contexts, context_text) = await asyncio.gather(
+                timed(
+                    "chat",
+                    "history_read",
+                    chat_memory.start_turn(
+                        session_id=request.session_id, query=request.query, count=10
+                    ),
+                ),
+                retrieve_contexts(
+                    embedding_client, vector_store, request.query, request.top_k
+                ),
+            )
+            yield sse_event(
+                "contexts",
+                [context.model_dump(mode="json") for context in retrieved_contexts],
+            )
+
+            cacheable, answer = await lookup_cached_answer(
+                answer_cache, request.query, chat_history, retrieved_contexts
+            )
+            # a finished extraction is kept; a pending one would delay the hit
+            booking_cancelled = answer is not None and booking_task.cancel()
+            if answer is not None:
+                parts.append(answer)
+                yield sse_event("token", {"delta": answer})
+            else:
+                # includes the time the client takes to read each token
+                with timed_stage("chat", "llm_stream"):
+                    async for delta in llm_client.stream_response(
+                        query=request.query,
+                        context=context_text,
+                        chat_history=chat_history,
+                    ):
+                        parts.append(delta)
+                        yield sse_event("token", {"delta": delta})
+                answer = "".join(parts)
+                if cacheable:
+                    await answer_cache.set(request.query, retrieved_contexts, answer)
+
+            if booking_cancelled:
+                booking_info = await llm_client.extract_booking_info(
+                    request.query, llm_fallback=False
+                )
+            else:
+                booking_info = await booking_task
+            booking, booking_id = None, None
+            if booking_info:
+                # request-scoped DB sessions are closed before a streamed body runs
+                async with AsyncSessionLocal() as db:
+                    booking = await create_booking_if_complete(
+                        Meta_Data_Store(db), booking_info, request.session_id
+                    )
+                    await db.commit()
+            if booking:
+                booking_id = booking.id
+                yield sse_event(
+                    "token", {"delta": booking_confirmation(booking_info, booking_id)}
+                )
+
+            yield sse_event(
+                "done",
+                {
+                    "session_id": request.session_id,
+                    "booking_detected": booking is not None,
+                    "booking_id": booking_id,
+                    "booking_info": (
+                        booking_info.model_dump() if booking_info else None
+                    ),
+                },
+            )
+        except Exception as e:
+            logger.error(f"Error streaming chat response: {e}", exc_info=True)
+            yield sse_event("error", {"detail": f"Failed to process chat request: {e}"})
+        finally:
+            if not booking_task.done():
+                booking_task.cancel()
+            # start_turn already stored the query, so save whatever was
+            # answered even if the client left or the turn failed midway
+            if parts:
+                await asyncio.shield(
+                    persist_answer(chat_memory, request.session_id, "".join(parts))
+                )
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/bookings", response_model=BookingListResponse)
 async def get_bookings(db: AsyncSession = Depends(get_db)):
     try:
@@ -11,6 +11,12 @@ class Settings(BaseSettings):
     log_level: str = "INFO"
     host: str = "0.0.0.0"
     port: int = 8000
+    metrics_enabled: bool = Field(
+        default=True, description="Expose Prometheus metrics on /metrics"
+    )
+    server_timing_enabled: bool = Field(
+        default=False, description="Add per-stage Server-Timing response headers"
+    )
 
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", case_sensitive=False, extra="ignore"
@@ -24,8 +30,56 @@ class Settings(BaseSettings):
         default="cohere", description="embedding provider"
     )
     embedding_dim: int = Field(default=1024, description="Embedding Vector Dimension")
-    vector_store_type: Literal["pinecone"] = Field(
-        default="pinecone", description="pinecone for database"
+    embedding_batch_size: int = Field(
+        default=96, description="Texts per embedding request (Cohere max is 96)"
+    )
+    embedding_max_concurrency: int = Field(
+        default=4, description="Max embedding requests in flight per document"
+    )
+    embedding_max_retries: int = Field(
+        default=3, description="Retries per failed embedding batch"
+    )
+    embedding_retry_backoff: float = Field(
+        default=0.5, description="Base backoff in seconds between embedding retries"
+    )
+    embedding_cache_enabled: bool = Field(
+        default=True, description="Cache embeddings by content hash"
+    )
+    embedding_cache_size: int = Field(
+        default=10000, description="Max embeddings kept in the in-process LRU"
+    )
+    embedding_cache_use_redis: bool = Field(
+        default=True, description="Use Redis as the second embedding cache tier"
+    )
+    embedding_cache_ttl: int = Field(
+        default=7 * 24 * 3600, description="Embedding cache TTL in Redis (seconds)"
+    )
+    vector_store_type: Literal["pinecone", "numpy", "hnsw"] = Field(
+        default="pinecone",
+        description="pinecone for database, numpy/hnsw for an in-process store",
+    )
+    local_vector_store_path: Optional[str] = Field(
+        default=None,
+        description="Directory to persist in-process vector stores (memory only if unset)",
+    )
+    retrieval_cache_enabled: bool = Field(
+        default=True,
+        description="Cache Pinecone search results in Redis until the corpus changes",
+    )
+    retrieval_cache_ttl: int = Field(
+        default=300, description="Seconds a cached search result is kept"
+    )
+    retrieval_cache_settle_seconds: int = Field(
+        default=5,
+        ge=0,
+        description="Seconds after a corpus change during which search results aren't cached, while Pinecone catches up",
+    )
+    hnsw_m: int = Field(default=16, description="HNSW graph degree (M)")
+    hnsw_ef_construction: int = Field(
+        default=200, description="HNSW candidate list size while inserting"
+    )
+    hnsw_ef_search: int = Field(
+        default=64, description="HNSW candidate list size while searching"
     )
     pinecone_api_key: Optional[str] = Field(
         default=None, description="api key for pinecone"
@@ -36,10 +90,30 @@ class Settings(BaseSettings):
     pinecone_index_name: str = Field(
         default="rag-documents", description="Pinecone index name"
     )
+    pinecone_max_workers: int = Field(
+        default=8, description="Threads serving blocking Pinecone SDK calls"
+    )
+    pinecone_upsert_batch_size: int = Field(
+        default=100, description="Vectors per Pinecone upsert request"
+    )
+    pinecone_upsert_parallelism: int = Field(
+        default=4, description="Concurrent Pinecone upsert batches"
+    )
+
+    pinecone_index_host: Optional[str] = Field(
+        default=None,
+        description="Connect straight to this index host, skipping index lookup",
+    )
 
     cohere_api_key: Optional[str] = Field(default=None, description="Cohere API key")
+    cohere_base_url: str = Field(
+        default="https://api.cohere.ai/v1", description="Cohere API base URL"
+    )
 
     groq_api_key: Optional[str] = Field(default=None, description="Groq api key ")
+    groq_base_url: str = Field(
+        default="https://api.groq.com/openai/v1", description="Groq API base URL"
+    )
 
     groq_chat_model: str = Field(
         default="llama-3.3-70b-versatile", description="Groq chat model"
@@ -49,6 +123,23 @@ class Settings(BaseSettings):
     llm_provider: Literal["groq"] = Field(
         default="groq", description="LLM provider for RAG"
     )
+    local_booking_extraction: bool = Field(
+        default=True,
+        description="Parse booking details locally and only call the LLM when ambiguous",
+    )
+
+    # Outbound HTTP client settings (shared by Cohere and Groq)
+    http_max_connections: int = Field(
+        default=100, description="Max pooled connections per provider client"
+    )
+    http_max_keepalive_connections: int = Field(
+        default=20, description="Max idle keep-alive connections per provider client"
+    )
+    http_keepalive_expiry: float = Field(
+        default=30.0, description="Seconds an idle keep-alive connection is kept"
+    )
+    http2_enabled: bool = Field(default=True, description="Use HTTP/2 when available")
+    http_timeout: float = Field(default=60.0, description="Default HTTP timeout")
 
     similarity_threshold: float = Field(
         default=0.7, description="Minimum similarity score for search results"
@@ -60,6 +151,13 @@ class Settings(BaseSettings):
         default=20, description="Max messages to keep in memory"
     )
 
+    answer_cache_enabled: bool = Field(
+        default=True, description="Reuse answers to repeated questions without history"
+    )
+    answer_cache_ttl: int = Field(
+        default=3600, description="Seconds a cached chat answer is kept"
+    )
+
     # DB settings
     postgres_user: str = Field(default="postgres", description="PostgreSQL username")
     postgres_password: str = Field(
@@ -101,6 +199,54 @@ class Settings(BaseSettings):
     upload_directory: str = Field(
         default="./uploads", description="Upload directory path"
     )
+    upload_chunk_size: int = Field(
+        default=1024 * 1024, description="Bytes read per step when storing uploads"
+    )
+
+    # ingestion job settings
+    ingestion_workers: int = Field(
+        default=2, ge=1, description="Background ingestion workers per process"
+    )
+    ingestion_job_ttl: int = Field(
+        default=7 * 24 * 3600, description="Seconds ingestion job status is kept"
+    )
+    ingestion_poll_timeout: int = Field(
+        default=5, ge=1, description="Seconds a worker blocks waiting for a job"
+    )
+    ingestion_heartbeat_ttl: int = Field(
+        default=30,
+        ge=3,
+        description="Seconds without a heartbeat before a worker's jobs are requeued",
+    )
+    ingestion_batch_size: int = Field(
+        default=256, ge=1, description="Chunks per batch flowing through ingestion"
+    )
+    ingestion_queue_size: int = Field(
+        default=2, ge=1, description="Batches buffered between ingestion stages"
+    )
+    ingestion_lock_ttl: int = Field(
+        default=3600,
+        description="Seconds an upload's content hash stays claimed by its job",
+    )
+    chunking_offload_threshold: int = Field(
+        default=1_000_000,
+        description="Texts with at least this many characters are chunked in a thread",
+    )
+
+    # PDF extraction settings
+    pdf_extraction_workers: Optional[int] = Field(
+        default=None, description="PDF extraction processes (defaults to CPU count)"
+    )
+    pdf_pages_per_task: int = Field(
+        default=8, ge=1, description="Pages extracted per process pool task"
+    )
+    pdf_extraction_timeout: float = Field(
+        default=120.0, description="Seconds allowed to extract one PDF"
+    )
+    pdf_page_error_policy: Literal["skip", "fail"] = Field(
+        default="skip",
+        description="Skip unreadable PDF pages or fail the whole document",
+    )
 
 
 settings = Settings()
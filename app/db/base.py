@@ -1,3 +1,4 @@
+from sqlalchemy import Connection, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
 from sqlalchemy.pool import NullPool
 
@@ -12,10 +13,34 @@ engine: AsyncEngine = create_async_engine(
     poolclass=NullPool if settings.debug else None,
 )
 
+# nullable columns added to existing tables: create_all() creates missing
+# tables but never alters one that already exists
+ADDED_COLUMNS = {
+    "documents": ["content_hash"],
+    "document_chunks": ["content_hash", "start_offset", "end_offset"],
+}
+
+
+def add_missing_columns(conn: Connection) -> None:
+    for table_name, column_names in ADDED_COLUMNS.items():
+        table = Base.metadata.tables[table_name]
+        for column_name in column_names:
+            column_type = table.c[column_name].type.compile(dialect=conn.dialect)
+            conn.execute(
+                text(
+                    f"ALTER TABLE {table_name} "
+                    f"ADD COLUMN IF NOT EXISTS {column_name} {column_type}"
+                )
+            )
+        for index in table.indexes:
+            if any(column.name in column_names for column in index.columns):
+                index.create(conn, checkfirst=True)
+
 
 async def init_db() -> None:
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(add_missing_columns)
 
 
 async def drop_db() -> None:
@@ -0,0 +1,163 @@
+"""
+Prometheus metrics and per-request stage timings.
+
+Stages are timed with `timed_stage` (or `timed` for a single awaitable). Every
+stage is observed in a histogram labelled by pipeline ("chat" or "ingest") and
+stage; during an HTTP request the durations are also collected for the
+Server-Timing response header when settings.server_timing_enabled is set.
+Metrics are per process: with several uvicorn workers, scrape each of them.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Iterator, List, Optional, Tuple, TypeVar
+
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+T = TypeVar("T")
+
+STAGE_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+STAGE_SECONDS = Histogram(
+    "rag_stage_duration_seconds",
+    "Time spent in one stage of a chat turn or ingestion job",
+    ["pipeline", "stage"],
+    buckets=STAGE_BUCKETS,
+)
+STAGE_ERRORS = Counter(
+    "rag_stage_errors_total",
+    "Stages that raised an exception",
+    ["pipeline", "stage"],
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "rag_http_request_duration_seconds",
+    "HTTP request latency until the response is complete",
+    ["method", "route", "status"],
+    buckets=STAGE_BUCKETS,
+)
+INGESTION_JOBS = Counter(
+    "rag_ingestion_jobs_total",
+    "Finished ingestion jobs",
+    ["operation", "status"],
+)
+ANSWER_CACHE_REQUESTS = Counter(
+    "rag_answer_cache_requests_total",
+    "Chat turns by answer cache outcome (hit, miss or bypass)",
+    ["result"],
+)
+INGESTED_CHUNKS = Counter(
+    "rag_ingested_chunks_total",
+    "Chunks written to Postgres and the vector store",
+)
+
+# (stage, seconds) of the current HTTP request, None outside of one
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def observe_stage(pipeline: str, stage: str, seconds: float) -> None:
+    STAGE_SECONDS.labels(pipeline, stage).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+@contextmanager
+def timed_stage(pipeline: str, stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(pipeline, stage).inc()
+        raise
+    finally:
+        observe_stage(pipeline, stage, time.perf_counter() - started)
+
+
+async def timed(pipeline: str, stage: str, awaitable: Awaitable[T]) -> T:
+    with timed_stage(pipeline, stage):
+        return await awaitable
+
+
+def format_server_timing(timings: List[Tuple[str, float]], total: float) -> str:
+    # stages that ran more than once (e.g. several DB writes) are summed
+    durations = {}
+    for stage, seconds in timings:
+        durations[stage] = durations.get(stage, 0.0) + seconds
+    durations["total"] = total
+    return ", ".join(
+        f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in durations.items()
+    )
+
+
+class Metrics_Middleware:
+    """
+    Times every HTTP request and adds a Server-Timing header.
+
+    Plain ASGI so the stage list set here is the one the endpoint appends to
+    and the header can be added when the response starts. Streamed responses
+    only report the stages that finished before the first byte.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: List[Tuple[str, float]] = []
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.server_timing_enabled:
+                    MutableHeaders(scope=message).append(
+                        "Server-Timing",
+                        format_server_timing(timings, time.perf_counter() - started),
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            # the route template keeps label cardinality bounded
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status),
+            ).observe(time.perf_counter() - started)
+
+
+def metrics_response() -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
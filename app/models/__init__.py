@@ -13,8 +13,11 @@ from app.models.schemas import (
     ChunkingStrategy,
     Fixed_length_Chunk_Config,
     Semantic_Chunk_Config,
+    Content_Defined_Chunk_Config,
     DocumentUploadRequest,
     Document_INGESTION_RESPONSE,
+    Ingestion_Job_Response,
+    Ingestion_Job_Status,
     ChatRequest,
     ChatResponse,
     RetrievedContext,
@@ -37,8 +40,11 @@ __all__ = [
     "ChunkingStrategy",
     "Fixed_length_Chunk_Config",
     "Semantic_Chunk_Config",
+    "Content_Defined_Chunk_Config",
     "DocumentUploadRequest",
     "Document_INGESTION_RESPONSE",
+    "Ingestion_Job_Response",
+    "Ingestion_Job_Status",
     "ChatRequest",
     "ChatResponse",
     "ChatMessageSchema",
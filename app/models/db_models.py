@@ -25,6 +25,10 @@ class Document(Base):
     file_path: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
     file_size: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     file_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    # sha256 of the uploaded bytes, used to detect re-uploads
+    content_hash: Mapped[Optional[str]] = mapped_column(
+        String(64), nullable=True, index=True
+    )
 
     total_chunks: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     chunking_strategy: Mapped[str] = mapped_column(String(50), nullable=False)
@@ -66,6 +70,14 @@ class DocumentChunk(Base):
 
     chunk_index: Mapped[int] = mapped_column(Integer, nullable=False)
     chunk_text: Mapped[str] = mapped_column(Text, nullable=False)
+    # informational: where chunk_text sat in the extracted text at ingestion.
+    # The extracted text itself isn't stored, so chunk_text is the only copy
+    start_offset: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    end_offset: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # sha256 of chunk_text, used to reuse embeddings of identical chunks
+    content_hash: Mapped[Optional[str]] = mapped_column(
+        String(64), nullable=True, index=True
+    )
 
     vector_id: Mapped[str] = mapped_column(
         String(255), nullable=False, unique=True, index=True
@@ -1,13 +1,15 @@
 # here is al the pydantic models for validation
 from datetime import datetime
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, model_validator
 from typing import Literal, Optional
 from uuid import UUID, uuid4
 
 
 # chunks
 class ChunkingStrategy(BaseModel):
-    type: Literal["fixed_len", "semantic"] = Field(description="type of chunk strategy")
+    type: Literal["fixed_len", "semantic", "content_defined"] = Field(
+        description="type of chunk strategy"
+    )
 
 
 class Fixed_length_Chunk_Config(ChunkingStrategy):
@@ -22,6 +24,23 @@ class Semantic_Chunk_Config(ChunkingStrategy):
     max_chunk_size: Optional[int] = Field(default=1000, ge=200)
 
 
+class Content_Defined_Chunk_Config(ChunkingStrategy):
+    """Boundaries come from a rolling hash of the text, so edits only move nearby chunks."""
+
+    type: Literal["content_defined"] = "content_defined"
+    min_chunk_size: int = Field(default=200, ge=50)
+    avg_chunk_size: int = Field(default=500, ge=100, le=4000)
+    max_chunk_size: int = Field(default=1000, ge=200, le=8000)
+
+    @model_validator(mode="after")
+    def check_sizes(self) -> "Content_Defined_Chunk_Config":
+        if not self.min_chunk_size < self.avg_chunk_size < self.max_chunk_size:
+            raise ValueError(
+                "min_chunk_size < avg_chunk_size < max_chunk_size must hold"
+            )
+        return self
+
+
 # llm or Rag schemas
 
 
@@ -133,10 +152,42 @@ class Document_INGESTION_RESPONSE(BaseModel):
     message: str = Field(default="Document ingested successfully")
 
 
+class Ingestion_Job_Response(BaseModel):
+    job_id: UUID = Field(description="Ingestion job UUID")
+    filename: str = Field(description="Original filename")
+    status: str = Field(description="Job status")
+    document_id: Optional[UUID] = Field(
+        default=None, description="Existing document for identical uploads"
+    )
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    message: str = Field(default="Document queued for ingestion")
+
+
+class Ingestion_Job_Status(BaseModel):
+    job_id: UUID = Field(description="Ingestion job UUID")
+    filename: str = Field(description="Original filename")
+    status: Literal["queued", "running", "completed", "failed"] = Field(
+        description="Job status"
+    )
+    stage: str = Field(description="Current pipeline stage")
+    progress: float = Field(description="Progress between 0 and 1")
+    error: Optional[str] = Field(default=None, description="Failure reason")
+    document_id: Optional[UUID] = Field(
+        default=None, description="Document UUID once ingested"
+    )
+    total_chunks: Optional[int] = Field(
+        default=None, description="Number of chunks created"
+    )
+    created_at: datetime
+    updated_at: datetime
+
+
 class DocumentUploadRequest(BaseModel):
     """Request model for document upload."""
 
-    chunking_strategy: Fixed_length_Chunk_Config | Semantic_Chunk_Config = Field(
+    chunking_strategy: (
+        Fixed_length_Chunk_Config | Semantic_Chunk_Config | Content_Defined_Chunk_Config
+    ) = Field(
         default_factory=Fixed_length_Chunk_Config,
         description="Chunking strategy configuration",
     )
@@ -1,19 +1,23 @@
 import json
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 import httpx
-from app.models.schemas import ChatMessage, Booking_Info
+from app.models.schemas import Booking_Info
 from app.config import settings
 from app.logger import logger
+from app.services.http_client import get_http_client
+from app.services.booking_extractor import extract_booking_locally
+from app.services.chat_history import Chat_Record
 
 
 class LLM_Client:
-    def __init__(self, provider: str):
+    def __init__(self, provider: str, http_client: Optional[httpx.AsyncClient] = None):
         self.provider = provider
 
         if provider == "groq":
             self.api_key = settings.groq_api_key
             self.model = settings.groq_chat_model
-            self.base_url = "https://api.groq.com/openai/v1/chat/completions"
+            self.base_url = f"{settings.groq_base_url.rstrip('/')}/chat/completions"
+            self.http_client = http_client or get_http_client("groq")
         else:
             raise ValueError(f"Problem with LLM provider {provider}")
 
@@ -21,7 +25,7 @@ class LLM_Client:
         self,
         query: str,
         context: str,
-        chat_history: List[ChatMessage],
+        chat_history: List[Chat_Record],
         temperature: float = None,
         max_tokens: int = None,
     ) -> str:
@@ -33,14 +37,9 @@ class LLM_Client:
                 query, context, chat_history, temperature, max_tokens
             )
 
-    async def generate_res_groq(
-        self,
-        query: str,
-        context: str,
-        chat_history: List[ChatMessage],
-        temperature: float = None,
-        max_tokens: int = None,
-    ) -> str:
+    def build_messages(
+        self, query: str, context: str, chat_history: List[Chat_Record]
+    ) -> List[dict]:
         system_message = {
             "role": "system",
             "content": (
@@ -59,32 +58,118 @@ class LLM_Client:
             messages.append({"role": msg.role, "content": msg.content})
 
         messages.append({"role": "user", "content": query})
+        return messages
 
-        async with httpx.AsyncClient() as client:
-            res = await client.post(
-                self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": self.model,
-                    "messages": messages,
-                    "temperature": temperature,
-                    "max_tokens": max_tokens,
-                },
-                timeout=60.0,
-            )
-            res.raise_for_status()
-            data = res.json()
-            answer = data["choices"][0]["message"]["content"]
+    async def generate_res_groq(
+        self,
+        query: str,
+        context: str,
+        chat_history: List[Chat_Record],
+        temperature: float = None,
+        max_tokens: int = None,
+    ) -> str:
+        messages = self.build_messages(query, context, chat_history)
 
-            provider_name = "Groq"
-            logger.info(f"Generated {provider_name} response ({len(answer)} chars)")
-            return answer
+        res = await self.http_client.post(
+            self.base_url,
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+            },
+            json={
+                "model": self.model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            },
+            timeout=60.0,
+        )
+        res.raise_for_status()
+        data = res.json()
+        answer = data["choices"][0]["message"]["content"]
+
+        provider_name = "Groq"
+        logger.info(f"Generated {provider_name} response ({len(answer)} chars)")
+        return answer
+
+    async def stream_response(
+        self,
+        query: str,
+        context: str,
+        chat_history: List[Chat_Record],
+        temperature: float = None,
+        max_tokens: int = None,
+    ) -> AsyncIterator[str]:
+        temperature = temperature or settings.llm_temperature
+        max_tokens = max_tokens or settings.llm_max_tokens
+
+        if self.provider == "groq":
+            async for delta in self.stream_res_groq(
+                query, context, chat_history, temperature, max_tokens
+            ):
+                yield delta
+
+    async def stream_res_groq(
+        self,
+        query: str,
+        context: str,
+        chat_history: List[Chat_Record],
+        temperature: float = None,
+        max_tokens: int = None,
+    ) -> AsyncIterator[str]:
+        messages = self.build_messages(query, context, chat_history)
+
+        async with self.http_client.stream(
+            "POST",
+            self.base_url,
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+            },
+            json={
+                "model": self.model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "stream": True,
+            },
+            timeout=60.0,
+        ) as res:
+            res.raise_for_status()
+            async for line in res.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = line[len("data:") :].strip()
+                if payload == "[DONE]":
+                    break
+                chunk = json.loads(payload)
+                choices = chunk.get("choices") or []
+                delta = choices[0].get("delta", {}).get("content") if choices else None
+                if delta:
+                    yield delta
 
     # extract Booking info
-    async def extract_booking_info(self, text: str) -> Optional[Booking_Info]:
+    async def extract_booking_info(
+        self, text: str, llm_fallback: bool = True
+    ) -> Optional[Booking_Info]:
+        if llm_fallback and not settings.local_booking_extraction:
+            return await self.extract_booking_info_llm(text)
+
+        local = extract_booking_locally(text)
+        if not local.has_signal:
+            logger.info("No booking signals in message, skipping LLM extraction")
+            return None
+        if local.is_complete:
+            booking_info = local.to_booking_info()
+            if booking_info:
+                logger.info(f"Extracted booking data locally: {booking_info}")
+                return booking_info
+
+        if not llm_fallback:
+            return None
+        return await self.extract_booking_info_llm(text)
+
+    async def extract_booking_info_llm(self, text: str) -> Optional[Booking_Info]:
         extraction_prompt = (
             "Extract interview booking information from the following text. "
             "Return ONLY a JSON object with these exact fields (use null if not found):\n\n"
@@ -141,38 +226,48 @@ class LLM_Client:
             return None
 
     async def extract_booking_info_groq(self, prompt: str) -> str:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": self.model,
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": "You are a JSON extraction bot. You ONLY output valid JSON. Never add explanations or extra text.",
-                        },
-                        {"role": "user", "content": prompt},
-                    ],
-                    "temperature": 0.0,
-                    "max_tokens": 500,
-                },
-                timeout=30.0,
-            )
-            response.raise_for_status()
-            data = response.json()
-            result = data["choices"][0]["message"]["content"].strip()
-            logger.info(f"Raw Extract response: {result[:200]}")
-            return result
+        response = await self.http_client.post(
+            self.base_url,
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+            },
+            json={
+                "model": self.model,
+                "messages": [
+                    {
+                        "role": "system",
+                        "content": "You are a JSON extraction bot. You ONLY output valid JSON. Never add explanations or extra text.",
+                    },
+                    {"role": "user", "content": prompt},
+                ],
+                "temperature": 0.0,
+                "max_tokens": 500,
+            },
+            timeout=30.0,
+        )
+        response.raise_for_status()
+        data = response.json()
+        result = data["choices"][0]["message"]["content"].strip()
+        logger.info(f"Raw Extract response: {result[:200]}")
+        return result
 
 
-def get_llm_client() -> LLM_Client:
+def create_llm_client() -> LLM_Client:
     provider = settings.llm_provider
 
     if provider == "groq" and not settings.groq_api_key:
         raise ValueError("Groq API key required")
 
-    return LLM_Client(provider=provider)
+    return LLM_Client(provider=provider, http_client=get_http_client(provider))
+
+
+_llm_client: Optional[LLM_Client] = None
+
+
+async def get_llm_client() -> LLM_Client:
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = create_llm_client()
+        logger.info(f"Initialized {settings.llm_provider} LLM client")
+    return _llm_client
@@ -0,0 +1,114 @@
+"""
+Redis cache of generated chat answers.
+
+An answer is keyed on the normalized query, the sorted ids of the chunks it
+was generated from and the LLM settings, so a newly ingested document that
+changes what retrieval returns simply produces a different key. Each entry is
+also listed in a per-document index set, which lets updating or deleting a
+document drop every answer that used one of its chunks.
+
+Turns with chat history are never cached: the answer depends on the session.
+Cache errors are logged and treated as misses; they never fail a chat turn.
+"""
+
+import hashlib
+import json
+from datetime import datetime
+from typing import Iterable, List, Optional
+from uuid import UUID
+
+import redis.asyncio as redis
+
+from app.config import settings
+from app.logger import logger
+from app.models.schemas import RetrievedContext
+from app.services.chat_history import get_redis_client
+
+# bump when the prompt changes so old answers stop matching
+ANSWER_CACHE_VERSION = 1
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.casefold().split()).rstrip("?!. ")
+
+
+class Answer_Cache:
+    def __init__(self, redis_client: redis.Redis, ttl: int = 3600):
+        self.redis = redis_client
+        self.ttl = ttl
+
+    def answer_key(self, query: str, contexts: List[RetrievedContext]) -> str:
+        parts = [
+            str(ANSWER_CACHE_VERSION),
+            settings.llm_provider,
+            settings.groq_chat_model,
+            str(settings.llm_temperature),
+            str(settings.llm_max_tokens),
+            normalize_query(query),
+            *sorted(context.chunk_id for context in contexts),
+        ]
+        digest = hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+        return f"answer:{digest}"
+
+    def document_key(self, document_id: UUID | str) -> str:
+        return f"answer:doc:{document_id}"
+
+    async def get(self, query: str, contexts: List[RetrievedContext]) -> Optional[str]:
+        try:
+            data = await self.redis.get(self.answer_key(query, contexts))
+            if data is None:
+                return None
+            return json.loads(data)["answer"]
+        except Exception as e:
+            # a corrupt entry is a miss; the regenerated answer overwrites it
+            logger.warning(f"Answer cache read failed: {e}")
+            return None
+
+    async def set(
+        self, query: str, contexts: List[RetrievedContext], answer: str
+    ) -> None:
+        key = self.answer_key(query, contexts)
+        document_ids = {
+            context.metadata.get("document_id")
+            for context in contexts
+            if context.metadata.get("document_id")
+        }
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.set(
+                    key,
+                    json.dumps(
+                        {
+                            "answer": answer,
+                            "chunk_ids": [context.chunk_id for context in contexts],
+                            "created_at": datetime.utcnow().isoformat(),
+                        }
+                    ),
+                    ex=self.ttl,
+                )
+                for document_id in document_ids:
+                    # expired answers linger in the set until it expires too
+                    pipe.sadd(self.document_key(document_id), key)
+                    pipe.expire(self.document_key(document_id), self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Answer cache write failed: {e}")
+
+    async def invalidate_documents(self, document_ids: Iterable[UUID | str]) -> int:
+        """Drop every cached answer built from a chunk of these documents."""
+        index_keys = [self.document_key(document_id) for document_id in document_ids]
+        if not index_keys:
+            return 0
+        answer_keys = set()
+        for index_key in index_keys:
+            answer_keys.update(await self.redis.smembers(index_key))
+        await self.redis.delete(*answer_keys, *index_keys)
+        logger.info(
+            f"Invalidated {len(answer_keys)} cached answers for {len(index_keys)} documents"
+        )
+        return len(answer_keys)
+
+
+async def get_answer_cache() -> Answer_Cache:
+    redis_client = await get_redis_client()
+    return Answer_Cache(redis_client, ttl=settings.answer_cache_ttl)
@@ -0,0 +1,300 @@
+"""
+Deterministic booking extraction that runs before the LLM.
+
+Messages without any booking signal skip the LLM entirely, and messages
+where name, email, date and time all parse unambiguously are answered
+locally. Anything in between is left for the LLM to interpret.
+"""
+
+import re
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import List, Optional, Set
+
+from pydantic import ValidationError
+
+from app.models.schemas import Booking_Info
+
+MONTHS = {
+    "jan": 1,
+    "feb": 2,
+    "mar": 3,
+    "apr": 4,
+    "may": 5,
+    "jun": 6,
+    "jul": 7,
+    "aug": 8,
+    "sep": 9,
+    "oct": 10,
+    "nov": 11,
+    "dec": 12,
+}
+WEEKDAYS = [
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+]
+
+MONTH_WORDS = {
+    "january",
+    "february",
+    "march",
+    "april",
+    "may",
+    "june",
+    "july",
+    "august",
+    "september",
+    "october",
+    "november",
+    "december",
+    "sept",
+} | set(MONTHS)
+
+_MONTH = (
+    r"(?P<month>jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|"
+    r"july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?"
+)
+_DAY = r"(?P<day>\d{1,2})(?:st|nd|rd|th)?"
+_YEAR = r"(?:,?\s+(?P<year>\d{4}))?"
+
+EMAIL_RE = re.compile(
+    r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}"
+)
+ISO_DATE_RE = re.compile(r"\b(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})\b")
+MONTH_DAY_RE = re.compile(rf"\b{_MONTH}\s+{_DAY}\b{_YEAR}", re.IGNORECASE)
+DAY_MONTH_RE = re.compile(rf"\b{_DAY}\s+(?:of\s+)?{_MONTH}\b{_YEAR}", re.IGNORECASE)
+SLASH_DATE_RE = re.compile(r"\b\d{1,2}[/.]\d{1,2}(?:[/.]\d{2,4})?\b")
+RELATIVE_DAY_RE = re.compile(
+    r"\b(?P<word>day after tomorrow|tomorrow|today)\b", re.IGNORECASE
+)
+WEEKDAY_RE = re.compile(
+    r"\b(?:(?P<next>next|this|coming)\s+)?(?P<weekday>" + "|".join(WEEKDAYS) + r")\b",
+    re.IGNORECASE,
+)
+TIME_12H_RE = re.compile(
+    r"\b(?P<hour>1[0-2]|0?[1-9])(?::(?P<minute>[0-5]\d))?\s*(?P<meridiem>[ap])\.?\s*m\b\.?",
+    re.IGNORECASE,
+)
+TIME_24H_RE = re.compile(r"\b(?P<hour>[01]?\d|2[0-3]):(?P<minute>[0-5]\d)\b")
+NAMED_TIME_RE = re.compile(r"\b(?P<word>noon|midday|midnight)\b", re.IGNORECASE)
+
+# words that suggest a booking even when no field parses
+BOOKING_SIGNAL_RE = re.compile(
+    r"\b(book(?:ing|ed)?|schedul(?:e|ed|ing)|reschedul(?:e|ed|ing)|appointment|"
+    r"set\s+up|arrange|slot|o'?clock)\b",
+    re.IGNORECASE,
+)
+
+_NAME = r"(?P<name>[A-Z][a-zA-Z'\-]+(?:\s+[A-Z][a-zA-Z'\-]+){0,2})"
+NAME_PATTERNS = [
+    re.compile(
+        r"\b(?:book|schedule|set\s+up|arrange|reserve)\b[^.!?\n]*?\b(?:for|with)\s+"
+        + _NAME
+    ),
+    re.compile(r"\binterview\s+(?:for|with)\s+" + _NAME),
+    re.compile(r"\b[Mm]y name is\s+" + _NAME),
+    # "I am Interested in ..." is not a name: the name must end the clause
+    re.compile(
+        r"\b(?:[Tt]his is|I am|I'm)\s+"
+        + _NAME
+        + r"(?=\s*(?:[,.;:!?()<\n]|$|and\b|[\w.+-]+@))"
+    ),
+]
+NOT_NAMES = {
+    "an",
+    "a",
+    "the",
+    "me",
+    "interview",
+    "tomorrow",
+    "today",
+    "next",
+    "this",
+    "i",
+    "i'm",
+    "email",
+    "mr",
+    "ms",
+    "mrs",
+    "dr",
+} | set(WEEKDAYS)
+
+
+@dataclass
+class Local_Booking_Extraction:
+    name: Optional[str] = None
+    email: Optional[str] = None
+    date: Optional[str] = None
+    time: Optional[str] = None
+    has_signal: bool = False
+    ambiguous: Set[str] = field(default_factory=set)
+
+    @property
+    def is_complete(self) -> bool:
+        return not self.ambiguous and all([self.name, self.email, self.date, self.time])
+
+    def to_booking_info(self) -> Optional[Booking_Info]:
+        try:
+            return Booking_Info(
+                name=self.name, email=self.email, date=self.date, time=self.time
+            )
+        except ValidationError:
+            return None
+
+
+def _month_number(token: str) -> int:
+    return MONTHS[token.lower()[:3]]
+
+
+def _resolve_date(
+    year: Optional[int], month: int, day: int, today: date
+) -> Optional[date]:
+    try:
+        candidate = date(year or today.year, month, day)
+    except ValueError:
+        return None
+    if year is None and candidate < today:
+        try:
+            candidate = candidate.replace(year=candidate.year + 1)
+        except ValueError:
+            return None
+    return candidate
+
+
+def _unique(
+    values: List[str], field_name: str, result: Local_Booking_Extraction
+) -> Optional[str]:
+    distinct = list(dict.fromkeys(values))
+    if len(distinct) > 1:
+        result.ambiguous.add(field_name)
+        return None
+    return distinct[0] if distinct else None
+
+
+def extract_dates(
+    text: str, today: date, result: Local_Booking_Extraction
+) -> List[str]:
+    dates: List[date] = []
+
+    for match in ISO_DATE_RE.finditer(text):
+        resolved = _resolve_date(
+            int(match["year"]), int(match["month"]), int(match["day"]), today
+        )
+        if resolved is None:
+            result.ambiguous.add("date")
+        else:
+            dates.append(resolved)
+
+    for pattern in (MONTH_DAY_RE, DAY_MONTH_RE):
+        for match in pattern.finditer(text):
+            year = int(match["year"]) if match["year"] else None
+            resolved = _resolve_date(
+                year, _month_number(match["month"]), int(match["day"]), today
+            )
+            if resolved is None:
+                result.ambiguous.add("date")
+            else:
+                dates.append(resolved)
+
+    for match in RELATIVE_DAY_RE.finditer(text):
+        word = match["word"].lower()
+        offset = {"today": 0, "tomorrow": 1, "day after tomorrow": 2}[word]
+        dates.append(today + timedelta(days=offset))
+
+    for match in WEEKDAY_RE.finditer(text):
+        weekday = WEEKDAYS.index(match["weekday"].lower())
+        days_ahead = (weekday - today.weekday()) % 7 or 7
+        dates.append(today + timedelta(days=days_ahead))
+
+    # 12/01 could be December 1st or January 12th
+    if SLASH_DATE_RE.search(text):
+        result.ambiguous.add("date")
+
+    return [d.isoformat() for d in dates]
+
+
+def extract_times(text: str, result: Local_Booking_Extraction) -> List[str]:
+    times: List[str] = []
+
+    for match in TIME_12H_RE.finditer(text):
+        hour = int(match["hour"]) % 12
+        if match["meridiem"].lower() == "p":
+            hour += 12
+        times.append(f"{hour:02d}:{match['minute'] or '00'}")
+    without_12h = TIME_12H_RE.sub(" ", text)
+
+    for match in TIME_24H_RE.finditer(without_12h):
+        times.append(f"{int(match['hour']):02d}:{match['minute']}")
+
+    for match in NAMED_TIME_RE.finditer(text):
+        times.append("00:00" if match["word"].lower() == "midnight" else "12:00")
+
+    return times
+
+
+def extract_names(text: str, result: Local_Booking_Extraction) -> List[str]:
+    names: List[str] = []
+    for pattern in NAME_PATTERNS:
+        for match in pattern.finditer(text):
+            # drop leading capitalised non-names ("Interview John ...") and
+            # stop at the first one after the name ("Jane Doe Monday")
+            kept = []
+            skipped_month = False
+            for word in match["name"].split():
+                lowered = word.lower().strip("'-")
+                if lowered in NOT_NAMES or lowered in MONTH_WORDS:
+                    if kept:
+                        break
+                    skipped_month = skipped_month or lowered in MONTH_WORDS
+                    continue
+                kept.append(word)
+            if kept and skipped_month:
+                # "with May Lin" may be a first name, not a date
+                result.ambiguous.add("name")
+            elif kept:
+                names.append(" ".join(kept))
+    return names
+
+
+def collapse_names(names: List[str]) -> List[str]:
+    """Drop names contained in a longer candidate ("Jane" next to "Jane Doe")."""
+    collapsed = []
+    for name in dict.fromkeys(names):
+        padded = f" {name} "
+        if not any(other != name and padded in f" {other} " for other in names):
+            collapsed.append(name)
+    return collapsed
+
+
+def extract_booking_locally(
+    text: str, today: Optional[date] = None
+) -> Local_Booking_Extraction:
+    today = today or date.today()
+    result = Local_Booking_Extraction()
+
+    emails = [email.rstrip(".") for email in EMAIL_RE.findall(text)]
+    dates = extract_dates(text, today, result)
+    times = extract_times(text, result)
+    names = extract_names(text, result)
+
+    result.email = _unique(emails, "email", result)
+    result.date = (
+        _unique(dates, "date", result) if "date" not in result.ambiguous else None
+    )
+    result.time = _unique(times, "time", result)
+    # "My name is Jane" next to "interview with Jane Doe" isn't a conflict
+    result.name = (
+        _unique(collapse_names(names), "name", result)
+        if "name" not in result.ambiguous
+        else None
+    )
+
+    result.has_signal = bool(
+        emails or dates or times or result.ambiguous or BOOKING_SIGNAL_RE.search(text)
+    )
+    return result
@@ -1,15 +1,83 @@
 import json
-from typing import List, Optional
+import struct
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, timezone
 import redis.asyncio as redis
 
 from app.models.schemas import ChatMessage
 from app.config import settings
 from app.logger import logger
 
+# binary entry: magic byte, role code, epoch seconds (float64), UTF-8 content.
+# Entries written before this format are JSON objects and start with "{".
+MESSAGE_MAGIC = 0x01
+MESSAGE_HEADER = struct.Struct("<BBd")
+ROLES = ("user", "assistant", "system")
+ROLE_CODES = {role: code for code, role in enumerate(ROLES)}
+
+
+@dataclass(slots=True)
+class Chat_Record:
+    """A stored chat message; converted to ChatMessage only for API output."""
+
+    role: str
+    content: str
+    timestamp: float
+
+    def to_message(self) -> ChatMessage:
+        return ChatMessage(
+            role=self.role,
+            content=self.content,
+            timestamp=datetime.fromtimestamp(self.timestamp, timezone.utc).replace(
+                tzinfo=None
+            ),
+        )
+
+
+def encode_message(role: str, content: str, timestamp: float) -> bytes:
+    return MESSAGE_HEADER.pack(
+        MESSAGE_MAGIC, ROLE_CODES[role], timestamp
+    ) + content.encode("utf-8")
+
+
+def decode_messages(messages_data: List[bytes]) -> List[Chat_Record]:
+    records = []
+    unpack = MESSAGE_HEADER.unpack_from
+    header_size = MESSAGE_HEADER.size
+    for data in messages_data:
+        if data[0] == MESSAGE_MAGIC:
+            _, role_code, timestamp = unpack(data)
+            records.append(
+                Chat_Record(
+                    ROLES[role_code], data[header_size:].decode("utf-8"), timestamp
+                )
+            )
+        else:
+            msg_dict = json.loads(data)
+            # legacy timestamps are naive UTC from datetime.utcnow()
+            timestamp = (
+                datetime.fromisoformat(msg_dict["timestamp"])
+                .replace(tzinfo=timezone.utc)
+                .timestamp()
+            )
+            records.append(
+                Chat_Record(msg_dict["role"], msg_dict["content"], timestamp)
+            )
+    return records
+
 
 class ChatMemoryService:
+    """
+    Chat turns stored as a capped Redis list per session.
+
+    Writes run as one MULTI/EXEC pipeline (append, trim to max_messages_per_session,
+    refresh the TTL), so each call is a single atomic round trip. The client
+    must not decode responses, entries are binary.
+    """
+
     def __init__(self, redis_client: redis.Redis):
         self.redis = redis_client
         self.ttl = settings.chat_memory_ttl
@@ -18,59 +86,57 @@ class ChatMemoryService:
     def get_session_key(self, session_id: UUID) -> str:
         return f"chat:session:{session_id}"
 
-    async def add_message(self, session_id: UUID, role: str, content: str) -> None:
-        key = self.get_session_key(session_id=session_id)
-        message = {
-            "role": role,
-            "content": content,
-            "timestamp": datetime.utcnow().isoformat(),
-        }
-
-        await self.redis.rpush(key, json.dumps(message))
+    def _queue_append(self, pipe, key: str, messages: List[Tuple[str, str]]) -> None:
+        if messages:
+            now = time.time()
+            pipe.rpush(
+                key,
+                *(encode_message(role, content, now) for role, content in messages),
+            )
+            pipe.ltrim(key, -self.max_messages, -1)
+        pipe.expire(key, self.ttl)
 
-        await self.redis.ltrim(key, -self.max_messages, -1)
+    async def add_messages(
+        self, session_id: UUID, messages: List[Tuple[str, str]]
+    ) -> None:
+        """Append (role, content) pairs in order and refresh the session TTL."""
+        key = self.get_session_key(session_id=session_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            self._queue_append(pipe, key, messages)
+            await pipe.execute()
 
-        await self.redis.expire(key, self.ttl)
+        logger.debug(f"Added {len(messages)} messages to session {session_id}")
 
-        logger.debug(f"Added {role} message to sesion {session_id}")
+    async def add_message(self, session_id: UUID, role: str, content: str) -> None:
+        await self.add_messages(session_id, [(role, content)])
 
-    async def get_messages(self, session_id: UUID) -> List[ChatMessage]:
+    async def start_turn(
+        self, session_id: UUID, query: str, count: int = 10
+    ) -> List[Chat_Record]:
+        """Return the last `count` messages, then append the user's query."""
         key = self.get_session_key(session_id=session_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.lrange(key, -count, -1)
+            self._queue_append(pipe, key, [("user", query)])
+            messages_data = (await pipe.execute())[0]
 
-        messages_data = await self.redis.lrange(key, 0, -1)
-
-        messages = []
-
-        for msg_data in messages_data:
-            msg_dict = json.loads(msg_data)
-            messages.append(
-                ChatMessage(
-                    role=msg_dict["role"],
-                    content=msg_dict["content"],
-                    timestamp=datetime.fromisoformat(msg_dict["timestamp"]),
-                )
-            )
+        messages = decode_messages(messages_data)
         logger.debug(f"Retrieved {len(messages)} messages for session {session_id}")
         return messages
 
+    async def get_messages(self, session_id: UUID) -> List[ChatMessage]:
+        records = await self.get_recent_messages(session_id, count=0)
+        return [record.to_message() for record in records]
+
     async def get_recent_messages(
         self, session_id: UUID, count: int = 10
-    ) -> List[ChatMessage]:
+    ) -> List[Chat_Record]:
+        """Last `count` messages of the session; count=0 returns all of them."""
         key = self.get_session_key(session_id=session_id)
 
         messages_data = await self.redis.lrange(key, -count, -1)
 
-        messages = []
-
-        for msg_data in messages_data:
-            msg_dict = json.loads(msg_data)
-            messages.append(
-                ChatMessage(
-                    role=msg_dict["role"],
-                    content=msg_dict["content"],
-                    timestamp=datetime.fromisoformat(msg_dict["timestamp"]),
-                )
-            )
+        messages = decode_messages(messages_data)
         logger.debug(f"Retrieved {len(messages)} messages for session {session_id}")
         return messages
 
@@ -85,12 +151,11 @@ class ChatMemoryService:
         return bool(exists)
 
     async def extend_session_ttl(self, session_id: UUID) -> None:
-
-        key = self._get_session_key(session_id)
-        await self.redis.expire(key, self.ttl)
+        await self.add_messages(session_id, [])
 
 
 _redis_client: Optional[redis.Redis] = None
+_binary_redis_client: Optional[redis.Redis] = None
 
 
 async def get_redis_client() -> redis.Redis:
@@ -104,8 +169,23 @@ async def get_redis_client() -> redis.Redis:
     return _redis_client
 
 
+async def get_binary_redis_client() -> redis.Redis:
+    """Redis client returning raw bytes, for binary chat memory entries."""
+    global _binary_redis_client
+    if _binary_redis_client is None:
+        _binary_redis_client = redis.from_url(
+            settings.redis_url, decode_responses=False
+        )
+
+    return _binary_redis_client
+
+
 async def close_redis_client() -> None:
-    global _redis_client
+    global _redis_client, _binary_redis_client
+
+    if _binary_redis_client:
+        await _binary_redis_client.close()
+        _binary_redis_client = None
 
     if _redis_client:
         await _redis_client.close()
@@ -114,5 +194,5 @@ async def close_redis_client() -> None:
 
 
 async def get_chat_memory() -> ChatMemoryService:
-    redis_client = await get_redis_client()
+    redis_client = await get_binary_redis_client()
     return ChatMemoryService(redis_client)
@@ -5,146 +5,270 @@ Both common and Easy methods.
 """
 
 from abc import ABC, abstractmethod
-from app.models.schemas import Semantic_Chunk_Config, Fixed_length_Chunk_Config
+from app.models.schemas import (
+    Semantic_Chunk_Config,
+    Fixed_length_Chunk_Config,
+    Content_Defined_Chunk_Config,
+)
 from app.logger import logger
-from typing import Protocol, List
+from typing import Iterable, Iterator, List, Optional, Protocol, Tuple
+import random
 import re
 
+import numpy as np
+
+# (start, end) character offsets into the source text
+Span = Tuple[int, int]
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+PARAGRAPH_BOUNDARY = re.compile(r"\n\s*\n")
+
+
+def strip_span(text: str, start: int, end: int) -> Optional[Span]:
+    """Offsets of text[start:end].strip(), or None if that is empty."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return (start, end) if start < end else None
+
+
+def split_spans(
+    text: str, pattern: re.Pattern, start: int = 0, end: Optional[int] = None
+) -> Iterator[Span]:
+    """Yield the non-empty, stripped pieces of text[start:end] between matches."""
+    end = len(text) if end is None else end
+    for match in pattern.finditer(text, start, end):
+        span = strip_span(text, start, match.start())
+        if span:
+            yield span
+        start = match.end()
+    span = strip_span(text, start, end)
+    if span:
+        yield span
+
+
+def pack_spans(spans: Iterable[Span], max_size: int) -> Iterator[Span]:
+    """Merge consecutive spans while the merged span stays within max_size."""
+    current_start = current_end = None
+    for start, end in spans:
+        if current_start is None:
+            current_start, current_end = start, end
+        elif end - current_start > max_size:
+            yield current_start, current_end
+            current_start, current_end = start, end
+        else:
+            current_end = end
+    if current_start is not None:
+        yield current_start, current_end
+
 
 class ChunkerProtocal(Protocol):
     def chunk(self, text: str) -> List[str]: ...
 
+    def iter_chunks(self, text: str) -> Iterator[str]: ...
+
+    def iter_spans(self, text: str) -> Iterator[Span]: ...
+
 
 class BaseChunker(ABC):
     @abstractmethod
-    def chunk(self, text: str) -> List[str]:
+    def iter_spans(self, text: str) -> Iterator[Span]:
+        """Yield (start, end) offsets of chunks in document order."""
         pass
 
+    def iter_chunks(self, text: str) -> Iterator[str]:
+        """Yield chunks in document order without building the full list."""
+        for start, end in self.iter_spans(text):
+            yield text[start:end]
+
+    def spans(self, text: str) -> List[Span]:
+        return list(self.iter_spans(text))
+
+    def chunk(self, text: str) -> List[str]:
+        chunks = list(self.iter_chunks(text))
+        logger.info(f"{type(self).__name__} created {len(chunks)} chunks")
+        return chunks
+
 
 class Fixed_Length_Chunker(BaseChunker):
     def __init__(self, config: Fixed_length_Chunk_Config):
         self.chunk_size = config.chunk_size
         self.chunk_overlap = config.chunk_overlap
 
-    def chunk(self, text: str) -> List[str]:
-        if not text or not text.strip():
-            return []
-
-        chunks = []
+    def iter_spans(self, text: str) -> Iterator[Span]:
         start = 0
         text_len = len(text)
 
         while start < text_len:
-            end = start + self.chunk_size
-            chunk = text[start:end].strip()
-            if chunk:
-                chunks.append(chunk)
+            span = strip_span(text, start, min(start + self.chunk_size, text_len))
+            if span:
+                yield span
 
             start += self.chunk_size - self.chunk_overlap
             if self.chunk_overlap >= self.chunk_size:
                 break
 
-        logger.info(f"Fixed length chunking done | Created {len(chunks)}")
-        return chunks
-
 
 class Semantic_Chunker(BaseChunker):
+    """
+    Sentences (or paragraphs) are packed into chunks of at most max_chunk_size.
+
+    Chunks are slices of the source text, so the whitespace between the
+    packed sentences is kept as it appears in the document.
+    """
+
     def __init__(self, config: Semantic_Chunk_Config):
         self.split_by = config.split_by
         self.max_chunk_size = config.max_chunk_size
 
-    def chunk(self, text: str) -> List[str]:
-        if not text or not text.strip():
-            return []
-
+    def iter_spans(self, text: str) -> Iterator[Span]:
         if self.split_by == "sentence":
-            return self._chunk_by_sentence(text)
-        if self.split_by == "paragraph":
-            return self._chunk_by_paragraph(text)
-
-        return []
-
-    def _chunk_by_sentence(self, text: str) -> List[str]:
+            yield from self._chunk_by_sentence(text)
+        elif self.split_by == "paragraph":
+            yield from self._chunk_by_paragraph(text)
+
+    def _chunk_by_sentence(
+        self, text: str, start: int = 0, end: Optional[int] = None
+    ) -> Iterator[Span]:
+        return pack_spans(
+            split_spans(text, SENTENCE_BOUNDARY, start, end), self.max_chunk_size
+        )
+
+    def _chunk_by_paragraph(self, text: str) -> Iterator[Span]:
+        """
+        Chunk text by paragraphs, respecting max chunk size.
 
-        sentences = re.split(r"(?<=[.!?])\s+", text)
+        Paragraphs longer than max_chunk_size are chunked by sentence in place.
 
-        chunks = []
-        current_chunk = ""
+        Args:
+            text: Input text
 
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if not sentence:
-                continue
-            if (
-                current_chunk
-                and len(current_chunk) + len(sentence) + 1 > self.max_chunk_size
-            ):
-                chunks.append(current_chunk.strip())
-                current_chunk = sentence
+        Yields:
+            Offsets of paragraph-based chunks
+        """
+        current_start = current_end = None
+        for start, end in split_spans(text, PARAGRAPH_BOUNDARY):
+            if end - start > self.max_chunk_size:
+                if current_start is not None:
+                    yield current_start, current_end
+                    current_start = None
+                yield from self._chunk_by_sentence(text, start, end)
+            elif current_start is None:
+                current_start, current_end = start, end
+            elif end - current_start > self.max_chunk_size:
+                yield current_start, current_end
+                current_start, current_end = start, end
             else:
-                current_chunk = f"{current_chunk} {sentence}".strip()
+                current_end = end
 
-        if current_chunk:
-            chunks.append(current_chunk.strip())
+        if current_start is not None:
+            yield current_start, current_end
 
-        logger.info(f"Semantic sentence chunking created {len(chunks)} chunks")
-        return chunks
 
-    def _chunk_by_paragraph(self, text: str) -> List[str]:
-        """
-        Chunk text by paragraphs, respecting max chunk size.
+# fixed seed: boundaries must not change between processes or releases
+_gear_random = random.Random(0x5EED)
+_GEAR = [_gear_random.getrandbits(32) for _ in range(256)]
+_GEAR_ARRAY = np.array(_GEAR, dtype=np.uint32)
+_WHITESPACE = re.compile(r"\s")
 
-        Args:
-            text: Input text
 
-        Returns:
-            List of paragraph-based chunks
-        """
-        paragraphs = re.split(r"\n\s*\n", text)
+class Content_Defined_Chunker(BaseChunker):
+    """
+    Content-defined chunking with a gear rolling hash.
 
-        chunks = []
-        current_chunk = ""
+    A boundary is declared where the hash of the last ~32 characters hits a
+    mask, then moved forward to the next whitespace. Because the hash only
+    sees a small window, an edit changes the chunks around it while every
+    other boundary (and chunk) stays the same.
+    """
 
-        for paragraph in paragraphs:
-            paragraph = paragraph.strip()
-            if not paragraph:
-                continue
+    def __init__(self, config: Content_Defined_Chunk_Config):
+        self.min_chunk_size = config.min_chunk_size
+        self.avg_chunk_size = config.avg_chunk_size
+        self.max_chunk_size = config.max_chunk_size
+        # expect a hit every (avg - min) characters once past min_chunk_size
+        bits = max(1, (self.avg_chunk_size - self.min_chunk_size).bit_length() - 1)
+        self.mask = (1 << bits) - 1
 
-            if len(paragraph) > self.max_chunk_size:
-                sentence_chunks = self._chunk_by_sentence(paragraph)
+    def hash_hits(self, text: str, block_size: int = 1 << 16) -> np.ndarray:
+        """
+        Every position where the rolling hash of text[:pos] hits the mask.
 
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                    current_chunk = ""
+        Bit k of the gear hash only depends on the last k + 1 characters, so
+        the masked bits are a sum of a few shifted gear values and can be
+        computed for a whole block at once instead of one character at a time.
+        """
+        bits = self.mask.bit_length()
+        hits = []
+        for block_start in range(0, len(text), block_size):
+            # overlap so the first positions of the block see their full window
+            window_start = max(0, block_start - bits + 1)
+            window = text[window_start : block_start + block_size]
+            codes = np.frombuffer(
+                window.encode("utf-32-le", "surrogatepass"), dtype=np.uint32
+            )
+            gear = _GEAR_ARRAY[codes & 0xFF]
+            h = gear.copy()
+            for shift in range(1, bits):
+                h[shift:] += gear[:-shift] << np.uint32(shift)
+            offset = block_start - window_start
+            found = np.flatnonzero((h[offset:] & self.mask) == 0)
+            hits.append(found + block_start + 1)
+        return np.concatenate(hits) if hits else np.empty(0, dtype=np.intp)
+
+    def boundaries(self, text: str) -> Iterator[int]:
+        gear = _GEAR
+        mask = self.mask
+        min_size, max_size = self.min_chunk_size, self.max_chunk_size
+        # until a window is as long as the masked bits its hash differs from
+        # the one over the whole text, so those positions are hashed one by one
+        exact = min(mask.bit_length(), max_size)
+        text_len = len(text)
+        hits = self.hash_hits(text)
 
-                chunks.extend(sentence_chunks)
+        start = 0
+        while start < text_len:
+            limit = min(start + max_size, text_len)
+            end = limit
+            h = 0
+            pos = start
+            for char in text[start : min(start + exact, limit)]:
+                h = ((h << 1) + gear[ord(char) & 0xFF]) & 0xFFFFFFFF
+                pos += 1
+                if pos - start >= min_size and not h & mask:
+                    end = pos
+                    break
             else:
-                if (
-                    current_chunk
-                    and len(current_chunk) + len(paragraph) + 2 > self.max_chunk_size
-                ):
-                    chunks.append(current_chunk.strip())
-                    current_chunk = paragraph
-                else:
-                    current_chunk = (
-                        f"{current_chunk}\n\n{paragraph}".strip()
-                        if current_chunk
-                        else paragraph
-                    )
-
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-
-        logger.info(f"Semantic paragraph chunking created {len(chunks)} chunks")
-        return chunks
+                i = np.searchsorted(hits, max(start + min_size, pos + 1))
+                if i < len(hits) and hits[i] <= limit:
+                    end = int(hits[i])
+            # finish the current word so chunks don't split mid-token
+            if end < limit:
+                space = _WHITESPACE.search(text, end - 1, limit - 1)
+                end = space.end() if space else limit
+            yield end
+            start = end
+
+    def iter_spans(self, text: str) -> Iterator[Span]:
+        start = 0
+        for end in self.boundaries(text):
+            span = strip_span(text, start, end)
+            if span:
+                yield span
+            start = end
 
 
 def get_chunker(
-    config: Fixed_length_Chunk_Config | Semantic_Chunk_Config,
+    config: (
+        Fixed_length_Chunk_Config | Semantic_Chunk_Config | Content_Defined_Chunk_Config
+    ),
 ) -> BaseChunker:
     if isinstance(config, Fixed_length_Chunk_Config):
         return Fixed_Length_Chunker(config)
     elif isinstance(config, Semantic_Chunk_Config):
         return Semantic_Chunker(config)
+    elif isinstance(config, Content_Defined_Chunk_Config):
+        return Content_Defined_Chunker(config)
     else:
         raise ValueError(f"Unknown chunking config type: {type(config)}")
@@ -1,9 +1,11 @@
-from typing import List, Protocol
+from typing import List, Optional, Protocol
 from abc import ABC, abstractmethod
+import asyncio
 import httpx
 
 from app.config import settings
 from app.logger import logger
+from app.services.http_client import get_http_client
 
 
 class Embedding_Protocal(Protocol):
@@ -28,34 +30,71 @@ class Base_Embedding(ABC):
 
 # TODO we could add more embedding model from other providers like OpenAI since its not free so I chose this free one.
 class Cohere_Embedding(Base_Embedding):
-    def __init__(self, api_key: str):
+    # Cohere rejects embed requests with more than 96 texts
+    MAX_TEXTS_PER_REQUEST = 96
+    RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        api_key: str,
+        http_client: Optional[httpx.AsyncClient] = None,
+        batch_size: int = 96,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+    ):
         self.api_key = api_key
-        self.base_url = "https://api.cohere.ai/v1/embed"
+        self.base_url = f"{settings.cohere_base_url.rstrip('/')}/embed"
         self.model = "embed-english-v3.0"
+        self.http_client = http_client or get_http_client("cohere")
+        self.batch_size = max(1, min(batch_size, self.MAX_TEXTS_PER_REQUEST))
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+    async def _embed_batch(
+        self, texts: List[str], input_type: str, timeout: float
+    ) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self.http_client.post(
+                    self.base_url,
+                    headers={
+                        "Authorization": f"Bearer {self.api_key}",
+                        "Content-Type": "application/json",
+                    },
+                    json={
+                        "texts": texts,
+                        "model": self.model,
+                        "input_type": input_type,
+                        "embedding_types": ["float"],
+                    },
+                    timeout=timeout,
+                )
+                response.raise_for_status()
+                data = response.json()
+                return data["embeddings"]["float"]
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                retryable = (
+                    not isinstance(e, httpx.HTTPStatusError)
+                    or e.response.status_code in self.RETRYABLE_STATUS_CODES
+                )
+                if not retryable or attempt == self.max_retries:
+                    raise
+                delay = self.retry_backoff * (2**attempt)
+                logger.warning(
+                    f"Cohere embed batch of {len(texts)} failed ({e}), "
+                    f"retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})"
+                )
+                await asyncio.sleep(delay)
 
     async def embed_text(
         self, text: str, input_type: str = "search_query"
     ) -> List[float]:
-        async with httpx.AsyncClient() as client:
-            res = await client.post(
-                self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "texts": [text],
-                    "model": self.model,
-                    "input_type": input_type,
-                    "embedding_types": ["float"],
-                },
-                timeout=30.0,
-            )
-            res.raise_for_status()
-            data = res.json()
-            embedding = data["embeddings"]["float"][0]
-            logger.debug(f"Generated Cohere embeddings of dim {len(embedding)}")
-            return embedding
+        embeddings = await self._embed_batch([text], input_type, timeout=30.0)
+        embedding = embeddings[0]
+        logger.debug(f"Generated Cohere embeddings of dim {len(embedding)}")
+        return embedding
 
     async def embed_list_of_text(
         self, texts: List[str], input_type: str = "search_document"
@@ -63,32 +102,60 @@ class Cohere_Embedding(Base_Embedding):
         if not texts:
             return []
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "texts": texts,
-                    "model": self.model,
-                    "input_type": input_type,
-                    "embedding_types": ["float"],
-                },
-                timeout=60.0,
-            )
-            response.raise_for_status()
-            data = response.json()
-            embeddings = data["embeddings"]["float"]
-            logger.info(f"Generated {len(embeddings)} Cohere embeddings")
-            return embeddings
-
-
-def get_embedding_client() -> Base_Embedding:
+        batches = [
+            texts[i : i + self.batch_size]
+            for i in range(0, len(texts), self.batch_size)
+        ]
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await self._embed_batch(batch, input_type, timeout=60.0)
+
+        # gather keeps batch order, so flattening restores input order
+        results = await asyncio.gather(*(run(batch) for batch in batches))
+        embeddings = [embedding for batch in results for embedding in batch]
+        logger.info(
+            f"Generated {len(embeddings)} Cohere embeddings in {len(batches)} batches"
+        )
+        return embeddings
+
+
+def create_embedding_client() -> Base_Embedding:
     provider = settings.embedding_provider
 
     if provider == "cohere":
         if not settings.cohere_api_key:
             raise ValueError("Cohere API key required.")
-        return Cohere_Embedding(api_key=settings.cohere_api_key)
+        embedding_client = Cohere_Embedding(
+            api_key=settings.cohere_api_key,
+            http_client=get_http_client("cohere"),
+            batch_size=settings.embedding_batch_size,
+            max_concurrency=settings.embedding_max_concurrency,
+            max_retries=settings.embedding_max_retries,
+            retry_backoff=settings.embedding_retry_backoff,
+        )
+
+    if not settings.embedding_cache_enabled:
+        return embedding_client
+
+    # imported here because the cache module builds on Base_Embedding
+    from app.services.embedding_cache import Cached_Embedding, get_local_embedding_cache
+
+    return Cached_Embedding(
+        embedding_client,
+        local_cache=get_local_embedding_cache(),
+        use_redis=settings.embedding_cache_use_redis,
+        ttl=settings.embedding_cache_ttl,
+    )
+
+
+_embedding_client: Optional[Base_Embedding] = None
+
+
+async def get_embedding_client() -> Base_Embedding:
+    global _embedding_client
+    if _embedding_client is None:
+        _embedding_client = create_embedding_client()
+        logger.info(f"Initialized {settings.embedding_provider} embedding client")
+    return _embedding_client
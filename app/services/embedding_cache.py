@@ -0,0 +1,161 @@
+"""
+Content-addressed cache in front of any Base_Embedding.
+Lookups go to an in-process LRU first, then Redis, and only the
+remaining misses are sent to the embedding provider.
+"""
+
+import base64
+import hashlib
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import redis.asyncio as redis
+
+from app.config import settings
+from app.logger import logger
+from app.services.chat_history import get_redis_client
+from app.services.embed import Base_Embedding
+
+
+class LRU_Embedding_Cache:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: List[float]) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def encode_embedding(embedding: List[float]) -> str:
+    return base64.b64encode(array("f", embedding).tobytes()).decode("ascii")
+
+
+def decode_embedding(data: str) -> List[float]:
+    values = array("f")
+    values.frombytes(base64.b64decode(data))
+    return values.tolist()
+
+
+class Cached_Embedding(Base_Embedding):
+    def __init__(
+        self,
+        embedding_client: Base_Embedding,
+        local_cache: LRU_Embedding_Cache,
+        use_redis: bool = True,
+        ttl: int = 7 * 24 * 3600,
+    ):
+        self.embedding_client = embedding_client
+        self.model = getattr(embedding_client, "model", type(embedding_client).__name__)
+        self.local_cache = local_cache
+        self.use_redis = use_redis
+        self.ttl = ttl
+
+    def cache_key(self, text: str, input_type: str) -> str:
+        digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+        return f"emb:{self.model}:{input_type}:{digest}"
+
+    async def _redis(self) -> Optional[redis.Redis]:
+        if not self.use_redis:
+            return None
+        return await get_redis_client()
+
+    async def _redis_get_many(self, keys: List[str]) -> List[Optional[str]]:
+        try:
+            client = await self._redis()
+            if client is None:
+                return [None] * len(keys)
+            return await client.mget(keys)
+        except Exception as e:
+            logger.warning(f"Embedding cache read from Redis failed: {e}")
+            return [None] * len(keys)
+
+    async def _redis_set_many(self, items: Dict[str, List[float]]) -> None:
+        try:
+            client = await self._redis()
+            if client is None:
+                return
+            async with client.pipeline(transaction=False) as pipe:
+                for key, embedding in items.items():
+                    pipe.set(key, encode_embedding(embedding), ex=self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Embedding cache write to Redis failed: {e}")
+
+    async def embed_text(
+        self, text: str, input_type: str = "search_query"
+    ) -> List[float]:
+        embeddings = await self.embed_list_of_text([text], input_type=input_type)
+        return embeddings[0]
+
+    async def embed_list_of_text(
+        self, texts: List[str], input_type: str = "search_document"
+    ) -> List[List[float]]:
+        if not texts:
+            return []
+
+        keys = [self.cache_key(text, input_type) for text in texts]
+        found: Dict[str, List[float]] = {}
+
+        for key in keys:
+            if key not in found:
+                cached = self.local_cache.get(key)
+                if cached is not None:
+                    found[key] = cached
+
+        # unique keys still missing, mapped to the first text that produced them
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        if missing:
+            redis_values = await self._redis_get_many(list(missing))
+            for key, value in zip(list(missing), redis_values):
+                if value is None:
+                    continue
+                embedding = decode_embedding(value)
+                found[key] = embedding
+                self.local_cache.put(key, embedding)
+                del missing[key]
+
+        if missing:
+            new_embeddings = await self.embedding_client.embed_list_of_text(
+                list(missing.values()), input_type=input_type
+            )
+            fresh = dict(zip(missing.keys(), new_embeddings))
+            for key, embedding in fresh.items():
+                found[key] = embedding
+                self.local_cache.put(key, embedding)
+            await self._redis_set_many(fresh)
+
+        logger.debug(
+            f"Embedding cache: {len(missing)} of {len(set(keys))} unique texts sent to provider"
+        )
+        return [found[key] for key in keys]
+
+
+_local_cache: Optional[LRU_Embedding_Cache] = None
+
+
+def get_local_embedding_cache() -> LRU_Embedding_Cache:
+    global _local_cache
+    if _local_cache is None:
+        _local_cache = LRU_Embedding_Cache(max_size=settings.embedding_cache_size)
+    return _local_cache
@@ -0,0 +1,43 @@
+from typing import Dict, Literal
+import httpx
+
+from app.config import settings
+from app.logger import logger
+
+Provider = Literal["cohere", "groq"]
+
+_http_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def create_http_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+    return httpx.AsyncClient(
+        limits=limits,
+        http2=settings.http2_enabled,
+        timeout=httpx.Timeout(settings.http_timeout),
+    )
+
+
+def get_http_client(provider: Provider) -> httpx.AsyncClient:
+    client = _http_clients.get(provider)
+    if client is None or client.is_closed:
+        client = create_http_client()
+        _http_clients[provider] = client
+        logger.info(f"Created pooled HTTP client for {provider}")
+    return client
+
+
+async def init_http_clients() -> None:
+    for provider in ("cohere", "groq"):
+        get_http_client(provider)
+
+
+async def close_http_clients() -> None:
+    for provider, client in list(_http_clients.items()):
+        await client.aclose()
+        logger.info(f"Closed pooled HTTP client for {provider}")
+    _http_clients.clear()
@@ -0,0 +1,467 @@
+"""
+Redis-backed ingestion job queue.
+
+/api/ingest stores the upload and enqueues a job; a pool of async workers
+started in the lifespan pops jobs, runs the ingestion pipeline and records
+stage, progress and errors on the job so clients can poll for status.
+
+A worker moves each job id from the queue into its own processing list and
+only removes it there once the job has finished, so a job is never lost
+with the process running it. Workers refresh a heartbeat key; the
+processing lists of workers whose heartbeat expired (a crashed process)
+are pushed back onto the queue by any live pool.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import socket
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+import redis.asyncio as redis
+
+from app.config import settings
+from app.db.session import AsyncSessionLocal
+from app.logger import logger
+from app.metrics import INGESTION_JOBS
+from app.services.answer_cache import get_answer_cache
+from app.services.chat_history import get_redis_client
+from app.services.embed import get_embedding_client
+from app.services.ingestion_pipeline import (
+    Ingestion_Error,
+    ingest_file,
+    parse_chunking_config,
+    update_document,
+)
+from app.services.vectore_store_adapters import get_vector_store
+
+
+@dataclass
+class Ingestion_Job:
+    job_id: UUID
+    filename: str
+    file_path: str
+    file_size: int
+    chunking_type: str
+    chunking_config: Dict[str, Any]
+    content_hash: str = ""
+    # "ingest" creates a document, "update" re-ingests document_id in place
+    operation: str = "ingest"
+    status: str = "queued"
+    stage: str = "queued"
+    progress: float = 0.0
+    error: Optional[str] = None
+    document_id: Optional[UUID] = None
+    total_chunks: Optional[int] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    updated_at: datetime = field(default_factory=datetime.utcnow)
+
+    def to_redis(self) -> Dict[str, str]:
+        return {
+            "job_id": str(self.job_id),
+            "filename": self.filename,
+            "file_path": self.file_path,
+            "file_size": str(self.file_size),
+            "chunking_type": self.chunking_type,
+            "chunking_config": json.dumps(self.chunking_config),
+            "content_hash": self.content_hash,
+            "operation": self.operation,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": str(self.progress),
+            "error": self.error or "",
+            "document_id": str(self.document_id) if self.document_id else "",
+            "total_chunks": (
+                str(self.total_chunks) if self.total_chunks is not None else ""
+            ),
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+    @classmethod
+    def from_redis(cls, data: Dict[str, str]) -> "Ingestion_Job":
+        return cls(
+            job_id=UUID(data["job_id"]),
+            filename=data["filename"],
+            file_path=data["file_path"],
+            file_size=int(data["file_size"]),
+            chunking_type=data["chunking_type"],
+            chunking_config=json.loads(data["chunking_config"]),
+            content_hash=data.get("content_hash", ""),
+            operation=data.get("operation", "ingest"),
+            status=data["status"],
+            stage=data["stage"],
+            progress=float(data["progress"]),
+            error=data.get("error") or None,
+            document_id=UUID(data["document_id"]) if data.get("document_id") else None,
+            total_chunks=(
+                int(data["total_chunks"]) if data.get("total_chunks") else None
+            ),
+            created_at=datetime.fromisoformat(data["created_at"]),
+            updated_at=datetime.fromisoformat(data["updated_at"]),
+        )
+
+    @property
+    def dedup_key(self) -> str:
+        config_hash = hashlib.sha256(
+            json.dumps(self.chunking_config, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+        return f"ingest:lock:{self.content_hash}:{config_hash}"
+
+    @property
+    def document_lock_key(self) -> str:
+        return f"ingest:document_lock:{self.document_id}"
+
+
+class Ingestion_Job_Store:
+    queue_key = "ingest:queue"
+    workers_key = "ingest:workers"
+
+    def __init__(self, redis_client: redis.Redis):
+        self.redis = redis_client
+        self.ttl = settings.ingestion_job_ttl
+
+    def get_job_key(self, job_id: UUID) -> str:
+        return f"ingest:job:{job_id}"
+
+    def get_processing_key(self, worker_id: str) -> str:
+        return f"ingest:processing:{worker_id}"
+
+    def get_heartbeat_key(self, worker_id: str) -> str:
+        return f"ingest:worker:{worker_id}"
+
+    async def enqueue(self, job: Ingestion_Job) -> Ingestion_Job:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self.get_job_key(job.job_id), mapping=job.to_redis())
+            pipe.expire(self.get_job_key(job.job_id), self.ttl)
+            pipe.rpush(self.queue_key, str(job.job_id))
+            await pipe.execute()
+        logger.info(f"Queued ingestion job {job.job_id} for {job.filename}")
+        return job
+
+    async def save_job(self, job: Ingestion_Job) -> Ingestion_Job:
+        """Record a job without queueing it (e.g. already-ingested uploads)."""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self.get_job_key(job.job_id), mapping=job.to_redis())
+            pipe.expire(self.get_job_key(job.job_id), self.ttl)
+            await pipe.execute()
+        return job
+
+    async def claim_upload(self, job: Ingestion_Job) -> Optional[Ingestion_Job]:
+        """
+        Claim the job's content for ingestion across all API processes.
+
+        Returns None when the claim succeeded, otherwise the job that is
+        already ingesting the same content with the same chunking config.
+        """
+        if not job.content_hash:
+            return None
+        return await self._claim(job.dedup_key, job)
+
+    async def claim_document(self, job: Ingestion_Job) -> Optional[Ingestion_Job]:
+        """
+        Claim job.document_id for an update; returns the update job already
+        holding it, if any, so two updates never rewrite the same chunks.
+        """
+        return await self._claim(job.document_lock_key, job)
+
+    async def _claim(self, key: str, job: Ingestion_Job) -> Optional[Ingestion_Job]:
+        for _ in range(3):
+            claimed = await self.redis.set(
+                key, str(job.job_id), nx=True, ex=settings.ingestion_lock_ttl
+            )
+            if claimed:
+                return None
+            owner = await self.redis.get(key)
+            if owner is not None:
+                existing = await self.get_job(UUID(owner))
+                if existing is not None and existing.status in ("queued", "running"):
+                    return existing
+                # stale claim of a finished or expired job
+                await self.redis.delete(key)
+        return None
+
+    async def release_upload(self, job: Ingestion_Job) -> None:
+        if job.content_hash and await self.redis.get(job.dedup_key) == str(job.job_id):
+            await self.redis.delete(job.dedup_key)
+
+    async def release_document(self, job: Ingestion_Job) -> None:
+        if await self.redis.get(job.document_lock_key) == str(job.job_id):
+            await self.redis.delete(job.document_lock_key)
+
+    async def release_claims(self, job: Ingestion_Job) -> None:
+        await self.release_upload(job)
+        if job.operation == "update":
+            await self.release_document(job)
+
+    async def get_job(self, job_id: UUID) -> Optional[Ingestion_Job]:
+        data = await self.redis.hgetall(self.get_job_key(job_id))
+        if not data:
+            return None
+        return Ingestion_Job.from_redis(data)
+
+    async def update_job(self, job_id: UUID, **fields: Any) -> None:
+        values = {}
+        for name, value in fields.items():
+            if isinstance(value, (dict, list)):
+                value = json.dumps(value)
+            values[name] = "" if value is None else str(value)
+        values["updated_at"] = datetime.utcnow().isoformat()
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self.get_job_key(job_id), mapping=values)
+            pipe.expire(self.get_job_key(job_id), self.ttl)
+            await pipe.execute()
+
+    async def requeue(self, job_id: UUID, worker_id: str) -> None:
+        """Put a job taken by worker_id back at the front of the queue."""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                self.get_job_key(job_id),
+                mapping={
+                    "status": "queued",
+                    "stage": "queued",
+                    "progress": "0.0",
+                    "updated_at": datetime.utcnow().isoformat(),
+                },
+            )
+            pipe.lrem(self.get_processing_key(worker_id), 1, str(job_id))
+            pipe.lpush(self.queue_key, str(job_id))
+            await pipe.execute()
+
+    async def next_job_id(self, worker_id: str, timeout: int) -> Optional[UUID]:
+        item = await self.redis.blmove(
+            self.queue_key,
+            self.get_processing_key(worker_id),
+            timeout,
+            src="LEFT",
+            dest="RIGHT",
+        )
+        if item is None:
+            return None
+        return UUID(item)
+
+    async def finish(self, worker_id: str, job_id: UUID) -> None:
+        await self.redis.lrem(self.get_processing_key(worker_id), 1, str(job_id))
+
+    async def heartbeat(self, worker_ids: List[str]) -> None:
+        ttl = settings.ingestion_heartbeat_ttl
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.sadd(self.workers_key, *worker_ids)
+            for worker_id in worker_ids:
+                pipe.set(self.get_heartbeat_key(worker_id), "1", ex=ttl)
+            await pipe.execute()
+
+    async def release_worker(self, worker_id: str) -> int:
+        """Requeue everything in worker_id's processing list and forget it."""
+        processing_key = self.get_processing_key(worker_id)
+        requeued = 0
+        while True:
+            item = await self.redis.lmove(
+                processing_key, self.queue_key, src="RIGHT", dest="LEFT"
+            )
+            if item is None:
+                break
+            await self.update_job(
+                UUID(item), status="queued", stage="queued", progress=0.0
+            )
+            requeued += 1
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.srem(self.workers_key, worker_id)
+            pipe.delete(self.get_heartbeat_key(worker_id))
+            await pipe.execute()
+        return requeued
+
+    async def recover_stale_jobs(self) -> int:
+        """Requeue the jobs of workers whose heartbeat has expired."""
+        requeued = 0
+        for worker_id in await self.redis.smembers(self.workers_key):
+            if await self.redis.exists(self.get_heartbeat_key(worker_id)):
+                continue
+            count = await self.release_worker(worker_id)
+            if count:
+                logger.warning(
+                    f"Requeued {count} ingestion jobs of unresponsive worker {worker_id}"
+                )
+            requeued += count
+        return requeued
+
+
+class Ingestion_Worker_Pool:
+    def __init__(self, job_store: Ingestion_Job_Store, workers: int):
+        self.job_store = job_store
+        self.workers = workers
+        # unique per process: a restarted process must not reuse the
+        # processing list of the crashed one it replaces
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self.worker_ids = [f"{prefix}:{number}" for number in range(workers)]
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        await self.job_store.heartbeat(self.worker_ids)
+        requeued = await self.job_store.recover_stale_jobs()
+        if requeued:
+            logger.info(f"Recovered {requeued} ingestion jobs from crashed workers")
+        for worker_id in self.worker_ids:
+            self._tasks.append(
+                asyncio.create_task(self._run(worker_id), name=f"ingest-{worker_id}")
+            )
+        self._tasks.append(
+            asyncio.create_task(self._keep_alive(), name="ingest-heartbeat")
+        )
+        logger.info(f"Started {self.workers} ingestion workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        for worker_id in self.worker_ids:
+            try:
+                await self.job_store.release_worker(worker_id)
+            except Exception as e:
+                logger.warning(f"Failed to release ingestion worker {worker_id}: {e}")
+        logger.info("Stopped ingestion workers")
+
+    async def _keep_alive(self) -> None:
+        interval = settings.ingestion_heartbeat_ttl / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.job_store.heartbeat(self.worker_ids)
+                await self.job_store.recover_stale_jobs()
+            except Exception as e:
+                logger.error(f"Ingestion worker heartbeat failed: {e}")
+
+    async def _run(self, worker_id: str) -> None:
+        while True:
+            try:
+                job_id = await self.job_store.next_job_id(
+                    worker_id, timeout=settings.ingestion_poll_timeout
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ingestion worker {worker_id} failed to poll queue: {e}")
+                await asyncio.sleep(settings.ingestion_poll_timeout)
+                continue
+            if job_id is None:
+                continue
+            try:
+                await self.process(job_id, worker_id)
+            except Exception as e:
+                # kept in the processing list: it is requeued once this
+                # worker is released or its heartbeat expires
+                logger.error(
+                    f"Ingestion worker {worker_id} failed on job {job_id}: {e}",
+                    exc_info=True,
+                )
+                continue
+            try:
+                await self.job_store.finish(worker_id, job_id)
+            except Exception as e:
+                # left in the processing list until this worker is released
+                logger.error(f"Failed to acknowledge ingestion job {job_id}: {e}")
+
+    async def process(self, job_id: UUID, worker_id: str) -> None:
+        job = await self.job_store.get_job(job_id)
+        if job is None:
+            logger.warning(f"Ingestion job {job_id} expired before processing")
+            return
+
+        async def report(stage: str, progress: float) -> None:
+            await self.job_store.update_job(
+                job_id, stage=stage, progress=round(progress, 3)
+            )
+
+        await self.job_store.update_job(job_id, status="running")
+        try:
+            embedding_client = await get_embedding_client()
+            vector_store = await get_vector_store()
+            async with AsyncSessionLocal() as db:
+                try:
+                    if job.operation == "update":
+                        document = await update_document(
+                            db,
+                            embedding_client,
+                            vector_store,
+                            document_id=job.document_id,
+                            file_path=job.file_path,
+                            filename=job.filename,
+                            file_size=job.file_size,
+                            report=report,
+                            content_hash=job.content_hash or None,
+                        )
+                    else:
+                        document = await ingest_file(
+                            db,
+                            embedding_client,
+                            vector_store,
+                            file_path=job.file_path,
+                            filename=job.filename,
+                            file_size=job.file_size,
+                            chunking_type=job.chunking_type,
+                            chunking_config=parse_chunking_config(job.chunking_config),
+                            report=report,
+                            content_hash=job.content_hash or None,
+                        )
+                    await db.commit()
+                except BaseException:
+                    await db.rollback()
+                    raise
+        except asyncio.CancelledError:
+            # shutting down mid-job: hand it back to the queue
+            await asyncio.shield(self.job_store.requeue(job_id, worker_id))
+            raise
+        except Exception as e:
+            if not isinstance(e, Ingestion_Error):
+                logger.error(f"Ingestion job {job_id} failed: {e}", exc_info=True)
+            INGESTION_JOBS.labels(job.operation, "failed").inc()
+            await self.job_store.update_job(job_id, status="failed", error=str(e))
+            await self.job_store.release_claims(job)
+            return
+
+        INGESTION_JOBS.labels(job.operation, "completed").inc()
+        if job.operation == "update":
+            # answers built from the old chunks must not be served again
+            try:
+                answer_cache = await get_answer_cache()
+                await answer_cache.invalidate_documents([document.id])
+            except Exception as e:
+                logger.warning(f"Failed to invalidate answers of {document.id}: {e}")
+        await self.job_store.update_job(
+            job_id,
+            status="completed",
+            stage="done",
+            progress=1.0,
+            document_id=document.id,
+            total_chunks=document.total_chunks,
+        )
+        await self.job_store.release_claims(job)
+
+
+_worker_pool: Optional[Ingestion_Worker_Pool] = None
+
+
+async def get_job_store() -> Ingestion_Job_Store:
+    redis_client = await get_redis_client()
+    return Ingestion_Job_Store(redis_client)
+
+
+async def start_ingestion_workers() -> None:
+    global _worker_pool
+    if _worker_pool is None:
+        _worker_pool = Ingestion_Worker_Pool(
+            await get_job_store(), workers=settings.ingestion_workers
+        )
+        await _worker_pool.start()
+
+
+async def stop_ingestion_workers() -> None:
+    global _worker_pool
+    if _worker_pool is not None:
+        await _worker_pool.stop()
+        _worker_pool = None
@@ -0,0 +1,589 @@
+"""
+Document ingestion: text extraction, chunking, embedding and storage.
+Runs inside ingestion workers, outside of any HTTP request.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import time
+from pathlib import Path
+from collections import defaultdict
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.logger import logger
+from app.metrics import INGESTED_CHUNKS, observe_stage, timed, timed_stage
+from app.models.db_models import Document
+from app.models.schemas import (
+    Fixed_length_Chunk_Config,
+    Semantic_Chunk_Config,
+    Content_Defined_Chunk_Config,
+)
+from app.services.chunking import Span, get_chunker
+from app.services.embed import Base_Embedding
+from app.services.meta_data import Meta_Data_Store
+from app.services.pdf_extractor import PDF_Extraction_Error, extract_text_from_pdf_file
+from app.services.vectore_store_adapters import Base_Vector_Store
+
+# (stage, progress between 0 and 1)
+Progress_Callback = Callable[[str, float], Awaitable[None]]
+
+Chunking_Config = (
+    Fixed_length_Chunk_Config | Semantic_Chunk_Config | Content_Defined_Chunk_Config
+)
+
+
+class Ingestion_Error(Exception):
+    """The document cannot be ingested (e.g. no extractable text)."""
+
+
+def extract_text_from_text(file_content: bytes) -> str:
+    return file_content.decode("utf-8")
+
+
+def build_chunking_config(
+    chunking_type: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    split_by: str,
+    max_chunk_size: int,
+    min_chunk_size: int = 200,
+) -> Chunking_Config:
+    if chunking_type == "fixed_len":
+        return Fixed_length_Chunk_Config(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap
+        )
+    if chunking_type == "content_defined":
+        return Content_Defined_Chunk_Config(
+            min_chunk_size=min_chunk_size,
+            avg_chunk_size=chunk_size,
+            max_chunk_size=max_chunk_size,
+        )
+    return Semantic_Chunk_Config(split_by=split_by, max_chunk_size=max_chunk_size)
+
+
+def parse_chunking_config(config: Dict[str, Any]) -> Chunking_Config:
+    if config.get("type") == "fixed_len":
+        return Fixed_length_Chunk_Config(**config)
+    if config.get("type") == "content_defined":
+        return Content_Defined_Chunk_Config(**config)
+    return Semantic_Chunk_Config(**config)
+
+
+def chunk_content_hash(chunk_text: str) -> str:
+    return hashlib.sha256(chunk_text.encode("utf-8")).hexdigest()
+
+
+def assign_chunk_ids(
+    document_id: UUID, chunk_hashes: Iterable[str], taken: Iterable[str] = ()
+) -> List[str]:
+    """
+    Derive chunk ids from the document and chunk hash.
+
+    The same text keeps the same id across re-ingestions; repeated text in one
+    document gets a numeric suffix. Ids in `taken` are never handed out.
+    """
+    used = set(taken)
+    chunk_ids = []
+    for chunk_hash in chunk_hashes:
+        occurrence = 0
+        chunk_id = f"{document_id}_{chunk_hash[:16]}"
+        while chunk_id in used:
+            occurrence += 1
+            chunk_id = f"{document_id}_{chunk_hash[:16]}_{occurrence}"
+        used.add(chunk_id)
+        chunk_ids.append(chunk_id)
+    return chunk_ids
+
+
+def embedding_model_name() -> str:
+    if settings.embedding_provider == "cohere":
+        return "cohere-embed"
+    return f"{settings.embedding_provider}-embed"
+
+
+async def embed_chunks(
+    metadata_store: Meta_Data_Store,
+    embedding_client: Base_Embedding,
+    vector_store: Base_Vector_Store,
+    chunks: List[str],
+    chunk_hashes: List[str],
+    db_lock: Optional[asyncio.Lock] = None,
+) -> List[List[float]]:
+    """
+    Embed chunks, reusing stored vectors of identical chunks.
+
+    Chunks whose hash already exists for the current embedding model are
+    fetched from the vector store; the rest are embedded once per distinct text.
+    """
+    async with db_lock or contextlib.nullcontext():
+        vector_ids = await metadata_store.get_vector_ids_by_chunk_hash(
+            chunk_hashes, embedding_model_name()
+        )
+    stored = (
+        await vector_store.fetch(list(set(vector_ids.values()))) if vector_ids else {}
+    )
+    by_hash = {
+        content_hash: stored[vector_id]
+        for content_hash, vector_id in vector_ids.items()
+        if vector_id in stored
+    }
+
+    missing = {}
+    for chunk_text, content_hash in zip(chunks, chunk_hashes):
+        if content_hash not in by_hash:
+            missing.setdefault(content_hash, chunk_text)
+    if missing:
+        embeddings = await embedding_client.embed_list_of_text(
+            list(missing.values()), input_type="search_document"
+        )
+        by_hash.update(zip(missing.keys(), embeddings))
+
+    logger.info(
+        f"Reused {len(chunks) - len(missing)} of {len(chunks)} chunk embeddings, "
+        f"embedded {len(missing)}"
+    )
+    return [by_hash[content_hash] for content_hash in chunk_hashes]
+
+
+async def extract_text(file_path: str, filename: str) -> str:
+    file_extension = Path(file_path).suffix.lower()
+    if file_extension == ".pdf":
+        try:
+            text = await extract_text_from_pdf_file(file_path)
+        except PDF_Extraction_Error as e:
+            raise Ingestion_Error(str(e)) from e
+    elif file_extension == ".txt":
+        file_content = await asyncio.to_thread(Path(file_path).read_bytes)
+        text = extract_text_from_text(file_content)
+    else:
+        raise Ingestion_Error(f"Unsupported file type {file_extension}")
+
+    if not text or not text.strip():
+        raise Ingestion_Error("No text could be extracted from the file")
+
+    logger.info(f"Extracted {len(text)} characters from {filename}")
+    return text
+
+
+async def chunk_spans(chunking_config: Chunking_Config, text: str) -> Iterable[Span]:
+    """
+    Chunk offsets for text, lazily for ordinary documents.
+
+    Texts of at least settings.chunking_offload_threshold characters are
+    chunked up front in a worker thread so the event loop stays responsive.
+    """
+    chunker = get_chunker(chunking_config)
+    if len(text) < settings.chunking_offload_threshold:
+        return chunker.iter_spans(text)
+    return await asyncio.to_thread(chunker.spans, text)
+
+
+def vector_metadata(
+    document_id: UUID, filename: str, idx: int, chunk_id: str, chunk_text: str
+) -> Dict[str, Any]:
+    return {
+        "chunk_id": chunk_id,
+        "chunk_text": chunk_text,
+        "filename": filename,
+        "chunk_index": idx,
+        "document_id": str(document_id),
+    }
+
+
+def build_chunk_records(
+    document_id: UUID,
+    filename: str,
+    chunks: Iterable[Tuple[int, str, Span, str, str, List[float]]],
+) -> Tuple[List[dict], List[Tuple[str, List[float], Dict[str, Any]]]]:
+    """Turn (index, chunk_id, span, text, hash, embedding) into DB rows and vectors."""
+    chunk_rows = []
+    vectors = []
+    for idx, chunk_id, (start, end), chunk_text, chunk_hash, embedding in chunks:
+        vector_id = f"vec_{chunk_id}"
+
+        chunk_rows.append(
+            {
+                "chunk_id": chunk_id,
+                "document_id": document_id,
+                "chunk_index": idx,
+                "chunk_text": chunk_text,
+                "vector_id": vector_id,
+                "content_hash": chunk_hash,
+                "start_offset": start,
+                "end_offset": end,
+                "metadata": {
+                    "filename": filename,
+                    "document_id": str(document_id),
+                },
+            }
+        )
+        vectors.append(
+            (
+                vector_id,
+                embedding,
+                vector_metadata(document_id, filename, idx, chunk_id, chunk_text),
+            )
+        )
+    return chunk_rows, vectors
+
+
+async def ingest_file(
+    db: AsyncSession,
+    embedding_client: Base_Embedding,
+    vector_store: Base_Vector_Store,
+    file_path: str,
+    filename: str,
+    file_size: int,
+    chunking_type: str,
+    chunking_config: Chunking_Config,
+    report: Progress_Callback,
+    content_hash: str = None,
+) -> Document:
+    file_extension = Path(file_path).suffix.lower()
+    metadata_store = Meta_Data_Store(db)
+
+    if content_hash:
+        existing = await metadata_store.get_document_by_content_hash(
+            content_hash,
+            chunking_type,
+            chunking_config.model_dump(),
+            embedding_model_name(),
+        )
+        if existing is not None:
+            logger.info(f"{filename} is identical to document {existing.id}")
+            if existing.file_path != file_path:
+                await asyncio.to_thread(Path(file_path).unlink, missing_ok=True)
+            return existing
+
+    await report("extracting", 0.05)
+    text = await timed("ingest", "parse", extract_text(file_path, filename))
+
+    document = await metadata_store.create_document(
+        filename=filename,
+        file_path=file_path,
+        file_size=file_size,
+        file_type=file_extension.lstrip("."),
+        total_chunks=0,
+        chunking_strategy=chunking_type,
+        chunking_config=chunking_config.model_dump(),
+        vector_store_type=settings.vector_store_type,
+        embedding_model=embedding_model_name(),
+        content_hash=content_hash,
+    )
+
+    await report("chunking", 0.15)
+    total_chunks = await run_ingestion_stages(
+        metadata_store,
+        embedding_client,
+        vector_store,
+        document.id,
+        filename,
+        text,
+        await timed("ingest", "chunk", chunk_spans(chunking_config, text)),
+        report,
+    )
+    if not total_chunks:
+        raise Ingestion_Error("No chunks were created from the text")
+
+    await metadata_store.update_document(document, total_chunks=total_chunks)
+    logger.info(f"Successfully ingested document {document.id}")
+    return document
+
+
+async def run_ingestion_stages(
+    metadata_store: Meta_Data_Store,
+    embedding_client: Base_Embedding,
+    vector_store: Base_Vector_Store,
+    document_id: UUID,
+    filename: str,
+    text: str,
+    spans: Iterable[Span],
+    report: Progress_Callback,
+) -> int:
+    """
+    Chunk -> embed -> store as concurrent stages joined by bounded queues.
+
+    Chunk offsets flow in batches of settings.ingestion_batch_size and are
+    only sliced out of the text once embedding starts. Embedding batch N+1
+    overlaps with writing batch N to Postgres and the vector store, and
+    memory is bounded by the queue sizes rather than the document size.
+    The session is shared by the stages, so DB calls are serialized.
+    """
+    batch_size = settings.ingestion_batch_size
+    to_embed: asyncio.Queue = asyncio.Queue(maxsize=settings.ingestion_queue_size)
+    to_store: asyncio.Queue = asyncio.Queue(maxsize=settings.ingestion_queue_size)
+    db_lock = asyncio.Lock()
+    used_chunk_ids: set = set()
+    upserted_ids: List[str] = []
+    stored = 0
+
+    async def produce() -> None:
+        # lazy chunkers do their work in next(); time only that, not the waits
+        chunking_seconds = 0.0
+        batch = []
+        span_iter = iter(spans)
+        while True:
+            started = time.perf_counter()
+            span = next(span_iter, None)
+            chunking_seconds += time.perf_counter() - started
+            if span is None:
+                break
+            batch.append(span)
+            if len(batch) == batch_size:
+                await to_embed.put(batch)
+                batch = []
+        if batch:
+            await to_embed.put(batch)
+        await to_embed.put(None)
+        observe_stage("ingest", "chunk", chunking_seconds)
+
+    async def embed() -> None:
+        first = 0
+        while (batch := await to_embed.get()) is not None:
+            chunks = [text[start:end] for start, end in batch]
+            chunk_hashes = [chunk_content_hash(chunk_text) for chunk_text in chunks]
+            with timed_stage("ingest", "embed"):
+                embeddings = await embed_chunks(
+                    metadata_store,
+                    embedding_client,
+                    vector_store,
+                    chunks,
+                    chunk_hashes,
+                    db_lock=db_lock,
+                )
+            await to_store.put((first, batch, chunks, chunk_hashes, embeddings))
+            first += len(batch)
+        await to_store.put(None)
+
+    async def store() -> None:
+        nonlocal stored
+        while (item := await to_store.get()) is not None:
+            first, batch, chunks, chunk_hashes, embeddings = item
+            chunk_ids = assign_chunk_ids(document_id, chunk_hashes, used_chunk_ids)
+            used_chunk_ids.update(chunk_ids)
+            chunk_rows, vectors = build_chunk_records(
+                document_id,
+                filename,
+                zip(
+                    range(first, first + len(batch)),
+                    chunk_ids,
+                    batch,
+                    chunks,
+                    chunk_hashes,
+                    embeddings,
+                ),
+            )
+            async with db_lock:
+                with timed_stage("ingest", "db_insert"):
+                    await metadata_store.create_chunks_bulk(chunk_rows)
+            with timed_stage("ingest", "vector_upsert"):
+                await vector_store.upsert(vectors)
+            upserted_ids.extend(vector_id for vector_id, _, _ in vectors)
+            stored += len(batch)
+            INGESTED_CHUNKS.inc(len(batch))
+            await report("storing", 0.2 + 0.75 * batch[-1][1] / len(text))
+
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(produce())
+            tg.create_task(embed())
+            tg.create_task(store())
+    except ExceptionGroup as eg:
+        # the DB rows roll back with the session; vectors need explicit cleanup
+        if upserted_ids:
+            try:
+                await vector_store.delete(upserted_ids)
+            except Exception as e:
+                logger.warning(f"Failed to remove vectors of failed ingestion: {e}")
+        raise eg.exceptions[0] from None
+
+    logger.info(f"Stored {stored} chunks for document {document_id}")
+    return stored
+
+
+async def update_document(
+    db: AsyncSession,
+    embedding_client: Base_Embedding,
+    vector_store: Base_Vector_Store,
+    document_id: UUID,
+    file_path: str,
+    filename: str,
+    file_size: int,
+    report: Progress_Callback,
+    content_hash: Optional[str] = None,
+) -> Document:
+    """
+    Re-ingest a new version of a document, touching only changed chunks.
+
+    The new text is chunked with the document's original config and matched
+    against the stored chunks by content hash: matches are kept (only their
+    index, offsets and, if they moved or the file was renamed, their vector
+    metadata are updated), new chunks are embedded and upserted, and chunks
+    that disappeared are deleted. Content-defined chunking keeps this
+    diff local to the edit; fixed-length chunking shifts every chunk after it.
+    """
+    metadata_store = Meta_Data_Store(db)
+    document = await metadata_store.get_document_by_id(document_id)
+    if document is None:
+        await asyncio.to_thread(Path(file_path).unlink, missing_ok=True)
+        raise Ingestion_Error(f"Document {document_id} not found")
+
+    file_extension = Path(file_path).suffix.lower()
+    if file_extension.lstrip(".") != document.file_type:
+        raise Ingestion_Error(
+            f"Expected a .{document.file_type} file, got {file_extension}"
+        )
+
+    if content_hash and content_hash == document.content_hash:
+        logger.info(f"Document {document_id} is unchanged")
+        if document.file_path != file_path:
+            await asyncio.to_thread(Path(file_path).unlink, missing_ok=True)
+        return document
+
+    await report("extracting", 0.05)
+    text = await timed("ingest", "parse", extract_text(file_path, filename))
+
+    await report("chunking", 0.15)
+    with timed_stage("ingest", "chunk"):
+        spans = list(
+            await chunk_spans(parse_chunking_config(document.chunking_config), text)
+        )
+    if not spans:
+        raise Ingestion_Error("No chunks were created from the text")
+    chunks = [text[start:end] for start, end in spans]
+    chunk_hashes = [chunk_content_hash(chunk_text) for chunk_text in chunks]
+
+    # pair each new chunk with an unused stored chunk of the same hash
+    existing_chunks = await metadata_store.get_chunks_by_document_id(document_id)
+    stored_by_hash = defaultdict(list)
+    for chunk in existing_chunks:
+        stored_by_hash[chunk.content_hash].append(chunk)
+
+    kept = {}
+    added = []
+    for idx, (span, chunk_text, chunk_hash) in enumerate(
+        zip(spans, chunks, chunk_hashes)
+    ):
+        if stored_by_hash.get(chunk_hash):
+            kept[stored_by_hash[chunk_hash].pop(0).id] = (idx, *span)
+        else:
+            added.append((idx, span, chunk_text, chunk_hash))
+    removed = [chunk for group in stored_by_hash.values() for chunk in group]
+    logger.info(
+        f"Updating document {document_id}: {len(kept)} unchanged, "
+        f"{len(added)} new, {len(removed)} removed chunks"
+    )
+
+    await report("embedding", 0.2)
+    with timed_stage("ingest", "embed"):
+        embeddings = await embed_chunks(
+            metadata_store,
+            embedding_client,
+            vector_store,
+            [chunk_text for _, _, chunk_text, _ in added],
+            [chunk_hash for _, _, _, chunk_hash in added],
+        )
+
+    # kept chunks whose chunk_index or filename in the vector metadata is stale
+    renamed = filename != document.filename
+    moved = [
+        chunk
+        for chunk in existing_chunks
+        if chunk.id in kept and (renamed or chunk.chunk_index != kept[chunk.id][0])
+    ]
+
+    await report("storing", 0.8)
+    with timed_stage("ingest", "db_update"):
+        await metadata_store.delete_chunks([chunk.id for chunk in removed])
+        await metadata_store.update_chunk_positions(
+            {
+                chunk.id: kept[chunk.id]
+                for chunk in existing_chunks
+                if chunk.id in kept
+                and (
+                    renamed
+                    or (chunk.chunk_index, chunk.start_offset, chunk.end_offset)
+                    != kept[chunk.id]
+                )
+            },
+            chunk_metadata=(
+                {"filename": filename, "document_id": str(document_id)}
+                if renamed
+                else None
+            ),
+        )
+    # never reuse an id that is still (or was just) in the vector store
+    chunk_ids = assign_chunk_ids(
+        document_id,
+        [chunk_hash for _, _, _, chunk_hash in added],
+        taken=[chunk.chunk_id for chunk in existing_chunks],
+    )
+    chunk_rows, vectors = build_chunk_records(
+        document_id,
+        filename,
+        (
+            (idx, chunk_id, span, chunk_text, chunk_hash, embedding)
+            for (idx, span, chunk_text, chunk_hash), chunk_id, embedding in zip(
+                added, chunk_ids, embeddings
+            )
+        ),
+    )
+    with timed_stage("ingest", "db_insert"):
+        await metadata_store.create_chunks_bulk(chunk_rows)
+
+    old_file_path = document.file_path
+    await metadata_store.update_document(
+        document,
+        filename=filename,
+        file_path=file_path,
+        file_size=file_size,
+        content_hash=content_hash,
+        total_chunks=len(chunks),
+    )
+
+    with timed_stage("ingest", "vector_upsert"):
+        if moved:
+            # the adapters have no metadata-only update, so re-upsert the values
+            stored = await vector_store.fetch([chunk.vector_id for chunk in moved])
+            for chunk in moved:
+                if chunk.vector_id not in stored:
+                    logger.warning(
+                        f"Vector {chunk.vector_id} of a kept chunk is missing"
+                    )
+                    continue
+                vectors.append(
+                    (
+                        chunk.vector_id,
+                        stored[chunk.vector_id],
+                        vector_metadata(
+                            document_id,
+                            filename,
+                            kept[chunk.id][0],
+                            chunk.chunk_id,
+                            chunk.chunk_text,
+                        ),
+                    )
+                )
+        await vector_store.upsert(vectors)
+        if removed:
+            await vector_store.delete([chunk.vector_id for chunk in removed])
+    INGESTED_CHUNKS.inc(len(added))
+    if old_file_path and old_file_path != file_path:
+        await asyncio.to_thread(Path(old_file_path).unlink, missing_ok=True)
+
+    logger.info(f"Successfully updated document {document_id}")
+    return document
@@ -1,6 +1,7 @@
-from typing import List, Optional
-from uuid import UUID
-from sqlalchemy import select, delete
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID, uuid4
+from sqlalchemy import select, delete, insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.db_models import Document, DocumentChunk, InterviewBooking, ChatSession
 from app.logger import logger
@@ -21,12 +22,14 @@ class Meta_Data_Store:
         chunking_config: dict,
         vector_store_type: str,
         embedding_model: str,
+        content_hash: Optional[str] = None,
     ) -> Document:
         document = Document(
             filename=filename,
             file_path=file_path,
             file_size=file_size,
             file_type=file_type,
+            content_hash=content_hash,
             total_chunks=total_chunks,
             chunking_strategy=chunking_strategy,
             chunking_config=chunking_config,
@@ -46,6 +49,9 @@ class Meta_Data_Store:
         chunk_text: str,
         vector_id: str,
         metadata: Optional[dict] = None,
+        content_hash: Optional[str] = None,
+        start_offset: Optional[int] = None,
+        end_offset: Optional[int] = None,
     ) -> DocumentChunk:
         chunk = DocumentChunk(
             chunk_id=chunk_id,
@@ -54,18 +60,138 @@ class Meta_Data_Store:
             chunk_text=chunk_text,
             vector_id=vector_id,
             chunk_metadata=metadata,
+            content_hash=content_hash,
+            start_offset=start_offset,
+            end_offset=end_offset,
         )
 
         self.db.add(chunk)
         await self.db.flush()
         return chunk
 
+    async def create_chunks_bulk(self, chunks: List[dict]) -> int:
+        """
+        Insert many chunks in one statement.
+
+        Each dict takes the same keys as create_chunk.
+        """
+        if not chunks:
+            return 0
+
+        created_at = datetime.utcnow()
+        rows = [
+            {
+                "id": uuid4(),
+                "chunk_id": chunk["chunk_id"],
+                "document_id": chunk["document_id"],
+                "chunk_index": chunk["chunk_index"],
+                "chunk_text": chunk["chunk_text"],
+                "vector_id": chunk["vector_id"],
+                "chunk_metadata": chunk.get("metadata"),
+                "content_hash": chunk.get("content_hash"),
+                "start_offset": chunk.get("start_offset"),
+                "end_offset": chunk.get("end_offset"),
+                "created_at": created_at,
+            }
+            for chunk in chunks
+        ]
+
+        # executemany on insert() is sent as batched multi-row INSERTs
+        await self.db.execute(insert(DocumentChunk), rows)
+
+        logger.info(f"Inserted {len(rows)} chunks in bulk")
+        return len(rows)
+
+    async def delete_chunks(self, ids: List[UUID]) -> int:
+        if not ids:
+            return 0
+        result = await self.db.execute(
+            delete(DocumentChunk).where(DocumentChunk.id.in_(ids))
+        )
+        logger.info(f"Deleted {result.rowcount} chunks")
+        return result.rowcount
+
+    async def update_chunk_positions(
+        self,
+        positions: Dict[UUID, Tuple[int, int, int]],
+        chunk_metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Set chunk_index and offsets (and chunk_metadata, when given) by chunk
+        primary key in one executemany UPDATE.
+        """
+        if not positions:
+            return
+        extra = {"chunk_metadata": chunk_metadata} if chunk_metadata else {}
+        await self.db.execute(
+            update(DocumentChunk),
+            [
+                {
+                    "id": id,
+                    "chunk_index": idx,
+                    "start_offset": start,
+                    "end_offset": end,
+                    **extra,
+                }
+                for id, (idx, start, end) in positions.items()
+            ],
+        )
+
+    async def update_document(self, document: Document, **fields) -> Document:
+        for name, value in fields.items():
+            setattr(document, name, value)
+        await self.db.flush()
+        await self.db.refresh(document)
+        return document
+
     async def get_document_by_id(self, document_id: UUID) -> Optional[Document]:
         result = await self.db.execute(
             select(Document).where(Document.id == document_id)
         )
         return result.scalar_one_or_none()
 
+    async def get_document_by_content_hash(
+        self,
+        content_hash: str,
+        chunking_strategy: str,
+        chunking_config: dict,
+        embedding_model: str,
+    ) -> Optional[Document]:
+        result = await self.db.execute(
+            select(Document)
+            .where(
+                Document.content_hash == content_hash,
+                Document.chunking_strategy == chunking_strategy,
+                Document.embedding_model == embedding_model,
+            )
+            .order_by(Document.created_at)
+        )
+        # json columns have no equality operator in Postgres, compare here
+        for document in result.scalars():
+            if document.chunking_config == chunking_config:
+                return document
+        return None
+
+    async def get_vector_ids_by_chunk_hash(
+        self, content_hashes: Iterable[str], embedding_model: str
+    ) -> Dict[str, str]:
+        """Map chunk content hashes to the vector id of an existing identical chunk."""
+        content_hashes = list(set(content_hashes))
+        if not content_hashes:
+            return {}
+        result = await self.db.execute(
+            select(DocumentChunk.content_hash, DocumentChunk.vector_id)
+            .join(Document, Document.id == DocumentChunk.document_id)
+            .where(
+                DocumentChunk.content_hash.in_(content_hashes),
+                Document.embedding_model == embedding_model,
+            )
+        )
+        vector_ids = {}
+        for content_hash, vector_id in result.all():
+            vector_ids.setdefault(content_hash, vector_id)
+        return vector_ids
+
     async def get_chunks_by_document_id(self, document_id: UUID) -> List[DocumentChunk]:
         result = await self.db.execute(
             select(DocumentChunk)
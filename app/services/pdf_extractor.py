@@ -0,0 +1,117 @@
+"""
+PDF text extraction in a process pool.
+
+PyPDF2 is pure Python and CPU bound, so pages are split into ranges that
+run in separate processes (each opening the file from disk) and are joined
+back in page order. This keeps the event loop free for chat requests.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import PyPDF2
+
+from app.config import settings
+from app.logger import logger
+
+
+class PDF_Extraction_Error(Exception):
+    """The PDF could not be read, timed out or a page failed under the fail policy."""
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_pdf_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.pdf_extraction_workers or os.cpu_count() or 1
+        )
+    return _executor
+
+
+def close_pdf_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def count_pdf_pages(file_path: str) -> int:
+    return len(PyPDF2.PdfReader(file_path).pages)
+
+
+def extract_page_range(
+    file_path: str, start: int, end: int, skip_failed_pages: bool
+) -> Tuple[List[str], List[int]]:
+    """Extract pages [start, end); returns page texts and failed page numbers."""
+    reader = PyPDF2.PdfReader(file_path)
+    texts = []
+    failed = []
+    for page_number in range(start, end):
+        try:
+            texts.append(reader.pages[page_number].extract_text() or "")
+        except Exception as e:
+            if not skip_failed_pages:
+                raise PDF_Extraction_Error(
+                    f"Failed to extract page {page_number + 1}: {e}"
+                ) from e
+            texts.append("")
+            failed.append(page_number)
+    return texts, failed
+
+
+def page_ranges(total_pages: int, pages_per_task: int) -> List[Tuple[int, int]]:
+    return [
+        (start, min(start + pages_per_task, total_pages))
+        for start in range(0, total_pages, pages_per_task)
+    ]
+
+
+async def extract_text_from_pdf_file(file_path: str) -> str:
+    loop = asyncio.get_running_loop()
+    executor = get_pdf_executor()
+    skip_failed_pages = settings.pdf_page_error_policy == "skip"
+
+    async def run() -> List[Tuple[List[str], List[int]]]:
+        total_pages = await loop.run_in_executor(executor, count_pdf_pages, file_path)
+        return await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    executor,
+                    extract_page_range,
+                    file_path,
+                    start,
+                    end,
+                    skip_failed_pages,
+                )
+                for start, end in page_ranges(total_pages, settings.pdf_pages_per_task)
+            )
+        )
+
+    try:
+        results = await asyncio.wait_for(run(), timeout=settings.pdf_extraction_timeout)
+    except asyncio.TimeoutError:
+        # page ranges already running finish in the background; queued ones are dropped
+        raise PDF_Extraction_Error(
+            f"PDF extraction timed out after {settings.pdf_extraction_timeout}s"
+        )
+    except PDF_Extraction_Error:
+        raise
+    except Exception as e:
+        raise PDF_Extraction_Error(f"Failed to read PDF: {e}") from e
+
+    pages = []
+    failed_pages = []
+    for texts, failed in results:
+        pages.extend(texts)
+        failed_pages.extend(failed)
+    if failed_pages:
+        logger.warning(
+            f"Skipped {len(failed_pages)} unreadable pages in {file_path}: "
+            f"{[page + 1 for page in failed_pages]}"
+        )
+    return "\n".join(pages).strip()
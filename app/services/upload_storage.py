@@ -0,0 +1,111 @@
+"""
+Stream uploads to disk in fixed-size pieces.
+
+Starlette parses and spools the whole multipart body before an endpoint
+runs, so Upload_Limit_Middleware caps the request body itself: requests
+announcing a larger Content-Length are rejected before anything is read,
+and bodies without one are cut off once they grow past the limit.
+save_upload then enforces the exact limit on the file while copying it and
+computes the sha256 content hash in the same pass.
+"""
+
+import hashlib
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import aiofiles
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+# multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class Upload_Too_Large(Exception):
+    """The upload exceeded settings.max_upload_size."""
+
+
+def too_large_detail(max_size: int) -> str:
+    return f"File size exceeds maximum allowed size of {max_size} bytes"
+
+
+class Upload_Limit_Middleware:
+    """Reject multipart bodies larger than max_upload_size while they arrive."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._is_multipart(scope):
+            await self.app(scope, receive, send)
+            return
+
+        limit = settings.max_upload_size + MULTIPART_OVERHEAD
+        detail = too_large_detail(settings.max_upload_size)
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length and int(content_length) > limit:
+            await JSONResponse({"detail": detail}, status_code=400)(
+                scope, receive, send
+            )
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # surfaces from request.form() as a regular 400 response
+                    raise HTTPException(status_code=400, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    def _is_multipart(scope: Scope) -> bool:
+        content_type = dict(scope["headers"]).get(b"content-type", b"")
+        return content_type.startswith(b"multipart/form-data")
+
+
+@dataclass
+class Stored_Upload:
+    file_path: str
+    file_size: int
+    content_hash: str
+
+
+async def save_upload(
+    upload: UploadFile,
+    destination: Path,
+    max_size: int = None,
+    chunk_size: int = None,
+) -> Stored_Upload:
+    max_size = max_size or settings.max_upload_size
+    chunk_size = chunk_size or settings.upload_chunk_size
+
+    digest = hashlib.sha256()
+    file_size = 0
+    try:
+        async with aiofiles.open(destination, "wb") as f:
+            while piece := await upload.read(chunk_size):
+                file_size += len(piece)
+                if file_size > max_size:
+                    raise Upload_Too_Large(too_large_detail(max_size))
+                digest.update(piece)
+                await f.write(piece)
+    except BaseException:
+        # never leave a partial file behind
+        destination.unlink(missing_ok=True)
+        raise
+
+    return Stored_Upload(
+        file_path=os.fspath(destination),
+        file_size=file_size,
+        content_hash=digest.hexdigest(),
+    )
@@ -1,13 +1,43 @@
+import asyncio
+from typing import Optional
 from app.services.vectore_store_adapters.base import (
     Base_Vector_Store,
     Vector_Search_Result,
 )
-from app.services.vectore_store_adapters.pinecone_adapter import Pinecone_Adapter
+from app.services.vectore_store_adapters.pinecone_adapter import (
+    Pinecone_Adapter,
+    close_pinecone_executor,
+)
+from app.services.vectore_store_adapters.numpy_adapter import Numpy_Adapter
+from app.services.vectore_store_adapters.hnsw_adapter import HNSW_Adapter, HNSW_Index
+from app.services.vectore_store_adapters.cached_adapter import Cached_Vector_Store
+from app.services.chat_history import get_redis_client
 from app.config import settings
 from app.logger import logger
 
 
-def get_vector_store() -> Base_Vector_Store:
+def create_vector_store() -> Base_Vector_Store:
+    if settings.vector_store_type == "numpy":
+        logger.info("Initializing in-process NumPy vector store")
+        return Numpy_Adapter(
+            dimension=settings.embedding_dim,
+            persist_path=settings.local_vector_store_path,
+        )
+
+    if settings.vector_store_type == "hnsw":
+        logger.info(
+            f"Initializing HNSW vector store (M={settings.hnsw_m}, "
+            f"ef_construction={settings.hnsw_ef_construction}, "
+            f"ef_search={settings.hnsw_ef_search})"
+        )
+        return HNSW_Adapter(
+            dimension=settings.embedding_dim,
+            m=settings.hnsw_m,
+            ef_construction=settings.hnsw_ef_construction,
+            ef_search=settings.hnsw_ef_search,
+            persist_path=settings.local_vector_store_path,
+        )
+
     if not settings.pinecone_api_key:
         raise ValueError("Pinecone API key is required")
     if not settings.pinecone_environment:
@@ -19,12 +49,57 @@ def get_vector_store() -> Base_Vector_Store:
         environment=settings.pinecone_environment,
         index_name=settings.pinecone_index_name,
         dimension=settings.embedding_dim,
+        batch_size=settings.pinecone_upsert_batch_size,
+        upsert_parallelism=settings.pinecone_upsert_parallelism,
+        index_host=settings.pinecone_index_host,
     )
 
 
+_vector_store: Optional[Base_Vector_Store] = None
+_vector_store_lock = asyncio.Lock()
+
+
+async def get_vector_store() -> Base_Vector_Store:
+    """Shared, initialized vector store; built once and reused by every request."""
+    global _vector_store
+    if _vector_store is None:
+        async with _vector_store_lock:
+            if _vector_store is None:
+                vector_store = create_vector_store()
+                if (
+                    settings.retrieval_cache_enabled
+                    and settings.vector_store_type == "pinecone"
+                ):
+                    # in-process stores answer faster than a Redis round trip
+                    vector_store = Cached_Vector_Store(
+                        vector_store,
+                        await get_redis_client(),
+                        ttl=settings.retrieval_cache_ttl,
+                        settle_seconds=settings.retrieval_cache_settle_seconds,
+                    )
+                await vector_store.initialize()
+                _vector_store = vector_store
+    return _vector_store
+
+
+async def close_vector_store() -> None:
+    global _vector_store
+    if _vector_store is not None:
+        await _vector_store.close()
+        _vector_store = None
+        logger.info("Closed vector store")
+
+
 __all__ = [
     "Base_Vector_Store",
     "Vector_Search_Result",
     "Pinecone_Adapter",
+    "Numpy_Adapter",
+    "HNSW_Adapter",
+    "HNSW_Index",
+    "Cached_Vector_Store",
+    "create_vector_store",
     "get_vector_store",
+    "close_vector_store",
+    "close_pinecone_executor",
 ]
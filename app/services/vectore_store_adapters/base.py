@@ -1,6 +1,7 @@
 from typing import List, Dict, Any, Protocol, Tuple
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
+import operator
 
 
 @dataclass
@@ -22,6 +23,8 @@ class Vector_Store_Protocal(Protocol):
 
     async def delete(self, ids: List[str]) -> None: ...
 
+    async def fetch(self, ids: List[str]) -> Dict[str, List[float]]: ...
+
 
 class Base_Vector_Store(ABC):
     @abstractmethod
@@ -46,3 +49,57 @@ class Base_Vector_Store(ABC):
     @abstractmethod
     async def delete(self, ids: List[str]) -> None:
         pass
+
+    @abstractmethod
+    async def fetch(self, ids: List[str]) -> Dict[str, List[float]]:
+        """Return stored vector values by id; unknown ids are left out."""
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+_COMPARISONS = {
+    "$gt": operator.gt,
+    "$gte": operator.ge,
+    "$lt": operator.lt,
+    "$lte": operator.le,
+}
+
+
+def match_metadata_filter(
+    metadata: Dict[str, Any], filter_dict: Dict[str, Any]
+) -> bool:
+    """Evaluate a Pinecone-style metadata filter against one metadata dict."""
+    for key, condition in filter_dict.items():
+        if key == "$and":
+            if not all(match_metadata_filter(metadata, sub) for sub in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(match_metadata_filter(metadata, sub) for sub in condition):
+                return False
+            continue
+
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+
+        for op, expected in condition.items():
+            if op == "$eq":
+                ok = value == expected
+            elif op == "$ne":
+                ok = value != expected
+            elif op == "$in":
+                ok = value in expected
+            elif op == "$nin":
+                ok = value not in expected
+            elif op == "$exists":
+                ok = (key in metadata) == bool(expected)
+            elif op in _COMPARISONS:
+                ok = value is not None and _COMPARISONS[op](value, expected)
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+            if not ok:
+                return False
+    return True
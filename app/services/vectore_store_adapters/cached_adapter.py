@@ -0,0 +1,146 @@
+"""
+Redis cache of search results in front of a remote vector store.
+
+Entries are keyed on a fingerprint of the query vector, top_k and the filter,
+and remember the corpus generation they were searched at. Every upsert and
+delete through this adapter increments the generation, so an entry written
+before the corpus changed no longer matches and is never served; old entries
+are left to expire instead of being purged. The generation and the entry are
+read in one round trip.
+
+Pinecone is eventually consistent, so a search right after a write can still
+return the old results. A bump therefore also opens a short settle window in
+which results are served uncached instead of being stored under the new
+generation.
+"""
+
+import hashlib
+import json
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis.asyncio as redis
+
+from app.logger import logger
+from app.services.vectore_store_adapters.base import (
+    Base_Vector_Store,
+    Vector_Search_Result,
+)
+
+GENERATION_KEY = "retrieval:generation"
+SETTLING_KEY = "retrieval:settling"
+
+
+def query_fingerprint(
+    query_vector: List[float], top_k: int, filter_dict: Optional[Dict[str, Any]]
+) -> str:
+    digest = hashlib.sha256(array("f", query_vector).tobytes())
+    digest.update(f"|{top_k}|".encode("ascii"))
+    digest.update(
+        json.dumps(filter_dict or {}, sort_keys=True, default=str).encode("utf-8")
+    )
+    return digest.hexdigest()
+
+
+class Cached_Vector_Store(Base_Vector_Store):
+    def __init__(
+        self,
+        vector_store: Base_Vector_Store,
+        redis_client: redis.Redis,
+        ttl: int = 300,
+        settle_seconds: int = 5,
+    ):
+        self.vector_store = vector_store
+        self.redis = redis_client
+        self.ttl = ttl
+        self.settle_seconds = settle_seconds
+
+    def cache_key(self, fingerprint: str) -> str:
+        return f"retrieval:{fingerprint}"
+
+    async def initialize(self) -> None:
+        await self.vector_store.initialize()
+
+    async def bump_generation(self) -> None:
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.incr(GENERATION_KEY)
+                if self.settle_seconds:
+                    pipe.set(SETTLING_KEY, 1, ex=self.settle_seconds)
+                await pipe.execute()
+        except Exception as e:
+            # entries cached before the write can be served until they expire
+            logger.warning(f"Failed to bump retrieval cache generation: {e}")
+
+    async def upsert(
+        self, vectors: List[Tuple[str, List[float], Dict[str, Any]]]
+    ) -> None:
+        try:
+            await self.vector_store.upsert(vectors)
+        finally:
+            await self.bump_generation()
+
+    async def delete(self, ids: List[str]) -> None:
+        try:
+            await self.vector_store.delete(ids)
+        finally:
+            await self.bump_generation()
+
+    async def fetch(self, ids: List[str]) -> Dict[str, List[float]]:
+        return await self.vector_store.fetch(ids)
+
+    async def _read(
+        self, key: str
+    ) -> Tuple[Optional[int], Optional[List[Vector_Search_Result]]]:
+        """Returns (generation to cache under, or None while settling; hit)."""
+        generation, settling, data = await self.redis.mget(
+            GENERATION_KEY, SETTLING_KEY, key
+        )
+        generation = None if settling else int(generation or 0)
+        if data is None:
+            return generation, None
+        entry = json.loads(data)
+        if generation is None or entry["generation"] != generation:
+            return generation, None
+        return generation, [
+            Vector_Search_Result(id=vec_id, score=score, metadata=metadata)
+            for vec_id, score, metadata in entry["results"]
+        ]
+
+    async def _write(
+        self, key: str, generation: int, results: List[Vector_Search_Result]
+    ) -> None:
+        entry = {
+            "generation": generation,
+            "results": [[r.id, r.score, r.metadata] for r in results],
+        }
+        await self.redis.set(key, json.dumps(entry), ex=self.ttl)
+
+    async def search(
+        self,
+        query_vector: List[float],
+        top_k: int = 5,
+        filter_dict: Dict[str, Any] = None,
+    ) -> List[Vector_Search_Result]:
+        key = self.cache_key(query_fingerprint(query_vector, top_k, filter_dict))
+        try:
+            generation, cached = await self._read(key)
+        except Exception as e:
+            logger.warning(f"Retrieval cache read failed: {e}")
+            return await self.vector_store.search(query_vector, top_k, filter_dict)
+        if cached is not None:
+            return cached
+
+        # stored under the generation read before searching: if the corpus
+        # changes meanwhile, the entry is already stale and won't be served
+        results = await self.vector_store.search(query_vector, top_k, filter_dict)
+        if generation is None:
+            return results
+        try:
+            await self._write(key, generation, results)
+        except Exception as e:
+            logger.warning(f"Retrieval cache write failed: {e}")
+        return results
+
+    async def close(self) -> None:
+        await self.vector_store.close()
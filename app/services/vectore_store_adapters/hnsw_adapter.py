@@ -0,0 +1,354 @@
+import asyncio
+import os
+import pickle
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+import hnswlib
+import numpy as np
+
+from app.services.vectore_store_adapters.base import (
+    Base_Vector_Store,
+    Vector_Search_Result,
+    match_metadata_filter,
+)
+from app.logger import logger
+
+
+class HNSW_Index:
+    """
+    Hierarchical Navigable Small World graph (hnswlib) over L2-normalized
+    float32 vectors, using cosine distance (1 - dot product).
+
+    Nodes are addressed by integer label. Deleted labels are tombstoned and
+    their slots are filled by later inserts, so the graph never has to be
+    rebuilt to reclaim them. A deleted label must not be inserted again.
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        m: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+        initial_capacity: int = 1024,
+        seed: Optional[int] = None,
+    ):
+        self.dimension = dimension
+        self.m = m
+        self.ef_construction = max(ef_construction, m)
+        self.ef_search = ef_search
+        self._index = hnswlib.Index(space="ip", dim=dimension)
+        self._index.init_index(
+            max_elements=max(initial_capacity, 1),
+            M=m,
+            ef_construction=self.ef_construction,
+            random_seed=100 if seed is None else seed,
+            allow_replace_deleted=True,
+        )
+        self._index.set_ef(ef_search)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def insert(self, vectors: np.ndarray, labels: List[int]) -> None:
+        """Add new labels; tombstoned slots are reused before the index grows."""
+        required = self._count + len(labels)
+        capacity = self._index.max_elements
+        if required > capacity:
+            self._index.resize_index(max(required, capacity * 2))
+        self._index.add_items(vectors, labels, replace_deleted=True)
+        self._count += len(labels)
+
+    def update(self, vectors: np.ndarray, labels: List[int]) -> None:
+        """Replace the vectors of live labels in place."""
+        # replace_deleted would move a live label into a vacant slot and
+        # leave its old node behind
+        self._index.add_items(vectors, labels)
+
+    def mark_deleted(self, label: int) -> None:
+        self._index.mark_deleted(label)
+        self._count -= 1
+
+    def get_items(self, labels: List[int]) -> np.ndarray:
+        if not labels:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return self._index.get_items(labels, return_type="numpy").astype(
+            np.float32, copy=False
+        )
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        ef: Optional[int] = None,
+        accept: Optional[Callable[[int], bool]] = None,
+    ) -> List[Tuple[float, int]]:
+        """Up to k (distance, label) pairs; fewer if accept rejects too many."""
+        k = min(k, len(self))
+        if k <= 0:
+            return []
+        self._index.set_ef(max(ef or self.ef_search, k))
+        try:
+            labels, dists = self._index.knn_query(query, k=k, filter=accept)
+        except RuntimeError:
+            # hnswlib raises when the filter leaves fewer than k hits
+            return []
+        finally:
+            self._index.set_ef(self.ef_search)
+        return [(float(d), int(label)) for d, label in zip(dists[0], labels[0])]
+
+
+class HNSW_Adapter(Base_Vector_Store):
+    """
+    Self-hosted approximate nearest-neighbour store backed by HNSW_Index.
+
+    Graph work runs in a worker thread behind a lock so inserts of large
+    batches do not block the event loop. Updates replace a vector in place
+    and deletes leave tombstones whose slots new inserts reuse, so the graph
+    is never rebuilt. When persist_path is set, the index is written to disk
+    shortly after changes (bursts are coalesced).
+
+    Inserts run at a few thousand vectors per second per core (ef_construction
+    200), so building a million-vector index takes minutes; the whole graph
+    and its metadata are held in memory.
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        m: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+        persist_path: Optional[str] = None,
+        persist_delay: float = 2.0,
+    ):
+        self.dimension = dimension
+        self.index = HNSW_Index(
+            dimension, m=m, ef_construction=ef_construction, ef_search=ef_search
+        )
+        self.persist_path = Path(persist_path) if persist_path else None
+        self.persist_delay = persist_delay
+        # labels are never reused, so a tombstoned label can't come back
+        self._ids: Dict[int, str] = {}
+        self._metadata: Dict[int, Dict[str, Any]] = {}
+        self._id_to_node: Dict[str, int] = {}
+        self._next_label = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+        self._save_task: Optional[asyncio.Task] = None
+
+    @property
+    def count(self) -> int:
+        return len(self._id_to_node)
+
+    @property
+    def index_file(self) -> Optional[Path]:
+        return self.persist_path / "hnsw_index.pkl" if self.persist_path else None
+
+    async def initialize(self) -> None:
+        if self._loaded:
+            return
+        if self.index_file and self.index_file.exists():
+            await asyncio.to_thread(self._load)
+            logger.info(f"Loaded HNSW index with {self.count} vectors")
+        self._loaded = True
+
+    @staticmethod
+    def _normalize(values: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(values, axis=-1, keepdims=True)
+        return values / np.where(norms == 0, 1.0, norms)
+
+    def _upsert_sync(
+        self, vectors: List[Tuple[str, List[float], Dict[str, Any]]]
+    ) -> None:
+        values = self._normalize(
+            np.asarray([values for _, values, _ in vectors], dtype=np.float32)
+        )
+        if values.shape[1] != self.dimension:
+            raise ValueError(
+                f"Vector dimension {values.shape[1]} does not match index dimension {self.dimension}"
+            )
+        # the last occurrence of an id in the batch wins
+        rows = {vec_id: row for row, (vec_id, _, _) in enumerate(vectors)}
+        with self._lock:
+            new_ids = [vec_id for vec_id in rows if vec_id not in self._id_to_node]
+            updated_ids = [vec_id for vec_id in rows if vec_id in self._id_to_node]
+            if new_ids:
+                labels = list(range(self._next_label, self._next_label + len(new_ids)))
+                self.index.insert(values[[rows[vec_id] for vec_id in new_ids]], labels)
+                self._next_label += len(new_ids)
+                for vec_id, label in zip(new_ids, labels):
+                    self._id_to_node[vec_id] = label
+                    self._ids[label] = vec_id
+            if updated_ids:
+                self.index.update(
+                    values[[rows[vec_id] for vec_id in updated_ids]],
+                    [self._id_to_node[vec_id] for vec_id in updated_ids],
+                )
+            for vec_id, row in rows.items():
+                self._metadata[self._id_to_node[vec_id]] = dict(vectors[row][2] or {})
+
+    async def upsert(
+        self, vectors: List[Tuple[str, List[float], Dict[str, Any]]]
+    ) -> None:
+        if not vectors:
+            return
+        await self.initialize()
+        await asyncio.to_thread(self._upsert_sync, vectors)
+        logger.info(f"Upserted {len(vectors)} vectors to HNSW index")
+        self._schedule_save()
+
+    def _search_sync(
+        self, query: np.ndarray, top_k: int, filter_dict: Optional[Dict[str, Any]]
+    ) -> List[Vector_Search_Result]:
+        with self._lock:
+            found = self._nearest(query, top_k, filter_dict)
+            return [
+                Vector_Search_Result(
+                    id=self._ids[node],
+                    score=1.0 - dist,
+                    metadata=dict(self._metadata[node]),
+                )
+                for dist, node in found
+            ]
+
+    def _nearest(
+        self, query: np.ndarray, top_k: int, filter_dict: Optional[Dict[str, Any]]
+    ) -> List[Tuple[float, int]]:
+        accept = None
+        if filter_dict:
+
+            def accept(node: int) -> bool:
+                return match_metadata_filter(self._metadata[node], filter_dict)
+
+        results = self.index.search(query, top_k, accept=accept)
+        if len(results) >= top_k:
+            return results
+
+        # too few approximate hits (selective filter): fall back to exact
+        # search over the eligible nodes
+        eligible = [node for node in self._ids if accept is None or accept(node)]
+        if len(eligible) <= len(results):
+            return results
+        dists = 1.0 - self.index.get_items(eligible) @ query
+        k = min(top_k, len(eligible))
+        if k < len(eligible):
+            top = np.argpartition(dists, k - 1)[:k]
+        else:
+            top = np.arange(len(eligible))
+        top = top[np.argsort(dists[top], kind="stable")]
+        return [(float(dists[i]), int(eligible[i])) for i in top]
+
+    async def search(
+        self,
+        query_vector: List[float],
+        top_k: int = 5,
+        filter_dict: Dict[str, Any] = None,
+    ) -> List[Vector_Search_Result]:
+        await self.initialize()
+        if self.count == 0 or top_k <= 0:
+            return []
+        query = self._normalize(np.asarray(query_vector, dtype=np.float32))
+        results = await asyncio.to_thread(self._search_sync, query, top_k, filter_dict)
+        logger.info(f"HNSW search returned {len(results)} results")
+        return results
+
+    def _delete_sync(self, ids: List[str]) -> int:
+        deleted = 0
+        with self._lock:
+            for vec_id in ids:
+                node = self._id_to_node.pop(vec_id, None)
+                if node is None:
+                    continue
+                self.index.mark_deleted(node)
+                del self._ids[node]
+                del self._metadata[node]
+                deleted += 1
+        return deleted
+
+    async def delete(self, ids: List[str]) -> None:
+        await self.initialize()
+        deleted = await asyncio.to_thread(self._delete_sync, ids)
+        logger.info(f"Deleted {deleted} vectors from HNSW index")
+        if deleted:
+            self._schedule_save()
+
+    def _fetch_sync(self, ids: List[str]) -> Dict[str, List[float]]:
+        with self._lock:
+            found = [vec_id for vec_id in ids if vec_id in self._id_to_node]
+            vectors = self.index.get_items(
+                [self._id_to_node[vec_id] for vec_id in found]
+            )
+        return {vec_id: row.tolist() for vec_id, row in zip(found, vectors)}
+
+    async def fetch(self, ids: List[str]) -> Dict[str, List[float]]:
+        # the lock can be held by an upsert batch in a worker thread
+        await self.initialize()
+        return await asyncio.to_thread(self._fetch_sync, ids)
+
+    def _schedule_save(self) -> None:
+        if not self.persist_path:
+            return
+        self._dirty = True
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._save_when_idle())
+
+    async def _save_when_idle(self) -> None:
+        while self._dirty:
+            await asyncio.sleep(self.persist_delay)
+            self._dirty = False
+            try:
+                await self.save()
+            except Exception as e:
+                logger.error(f"Failed to persist HNSW index: {e}", exc_info=True)
+
+    async def close(self) -> None:
+        if self._save_task is not None and not self._save_task.done():
+            self._save_task.cancel()
+        if self._dirty or self._save_task is not None:
+            self._dirty = False
+            await self.save()
+
+    async def save(self) -> None:
+        if not self.persist_path:
+            return
+        await asyncio.to_thread(self._write)
+        logger.info(f"Persisted HNSW index ({self.count} vectors) to {self.index_file}")
+
+    def _write(self) -> None:
+        with self._lock:
+            data = pickle.dumps(
+                {
+                    "index": self.index,
+                    "ids": self._ids,
+                    "metadata": self._metadata,
+                    "next_label": self._next_label,
+                },
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        self.persist_path.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.index_file.with_suffix(".tmp")
+        with open(tmp_file, "wb") as f:
+            f.write(data)
+        os.replace(tmp_file, self.index_file)
+
+    def _load(self) -> None:
+        with open(self.index_file, "rb") as f:
+            state = pickle.load(f)
+        index: HNSW_Index = state["index"]
+        if index.dimension != self.dimension:
+            raise ValueError(
+                f"Persisted index dimension {index.dimension} does not match {self.dimension}"
+            )
+        # search breadth follows the current settings, not the persisted ones
+        index.ef_search = self.index.ef_search
+        with self._lock:
+            self.index = index
+            self._ids = state["ids"]
+            self._metadata = state["metadata"]
+            self._next_label = state["next_label"]
+            self._id_to_node = {vec_id: node for node, vec_id in self._ids.items()}
@@ -0,0 +1,246 @@
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from app.services.vectore_store_adapters.base import (
+    Base_Vector_Store,
+    Vector_Search_Result,
+    match_metadata_filter,
+)
+from app.logger import logger
+
+
+class Numpy_Adapter(Base_Vector_Store):
+    """
+    In-process exact cosine search over a contiguous float32 matrix.
+
+    Rows are stored L2-normalized so a single matmul gives cosine scores.
+    Deleted rows are zeroed and recycled through a free list instead of
+    compacting the matrix. When persist_path is set, the store is written to
+    a single file shortly after changes (bursts are coalesced), replacing the
+    previous snapshot atomically.
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        initial_capacity: int = 1024,
+        persist_path: Optional[str] = None,
+        persist_delay: float = 2.0,
+    ):
+        self.dimension = dimension
+        self.persist_path = Path(persist_path) if persist_path else None
+        self.persist_delay = persist_delay
+        self._matrix = np.zeros((initial_capacity, dimension), dtype=np.float32)
+        self._alive = np.zeros(initial_capacity, dtype=bool)
+        self._ids: List[Optional[str]] = []
+        self._metadata: List[Optional[Dict[str, Any]]] = []
+        self._id_to_row: Dict[str, int] = {}
+        self._free_rows: List[int] = []
+        self._size = 0
+        self._loaded = False
+        self._dirty = False
+        self._save_task: Optional[asyncio.Task] = None
+
+    @property
+    def count(self) -> int:
+        return len(self._id_to_row)
+
+    @property
+    def store_file(self) -> Optional[Path]:
+        return self.persist_path / "numpy_store.npz" if self.persist_path else None
+
+    async def initialize(self) -> None:
+        if self._loaded:
+            return
+        if self.store_file and self.store_file.exists():
+            await asyncio.to_thread(self._load)
+            logger.info(
+                f"Loaded {self.count} vectors from {self.persist_path} into NumPy store"
+            )
+        self._loaded = True
+
+    def _grow(self, required: int) -> None:
+        capacity = self._matrix.shape[0]
+        if required <= capacity:
+            return
+        new_capacity = max(required, capacity * 2)
+        matrix = np.zeros((new_capacity, self.dimension), dtype=np.float32)
+        matrix[: self._size] = self._matrix[: self._size]
+        alive = np.zeros(new_capacity, dtype=bool)
+        alive[: self._size] = self._alive[: self._size]
+        self._matrix, self._alive = matrix, alive
+
+    def _allocate_row(self) -> int:
+        if self._free_rows:
+            return self._free_rows.pop()
+        self._grow(self._size + 1)
+        row = self._size
+        self._size += 1
+        self._ids.append(None)
+        self._metadata.append(None)
+        return row
+
+    async def upsert(
+        self, vectors: List[Tuple[str, List[float], Dict[str, Any]]]
+    ) -> None:
+        if not vectors:
+            return
+        await self.initialize()
+
+        values = np.asarray([values for _, values, _ in vectors], dtype=np.float32)
+        if values.shape[1] != self.dimension:
+            raise ValueError(
+                f"Vector dimension {values.shape[1]} does not match store dimension {self.dimension}"
+            )
+        norms = np.linalg.norm(values, axis=1, keepdims=True)
+        values /= np.where(norms == 0, 1.0, norms)
+
+        self._grow(self._size + len(vectors) - len(self._free_rows))
+        for (vec_id, _, metadata), row_values in zip(vectors, values):
+            row = self._id_to_row.get(vec_id)
+            if row is None:
+                row = self._allocate_row()
+                self._id_to_row[vec_id] = row
+            self._matrix[row] = row_values
+            self._alive[row] = True
+            self._ids[row] = vec_id
+            self._metadata[row] = dict(metadata or {})
+
+        logger.info(f"Upserted {len(vectors)} vectors to NumPy store")
+        self._schedule_save()
+
+    async def search(
+        self,
+        query_vector: List[float],
+        top_k: int = 5,
+        filter_dict: Dict[str, Any] = None,
+    ) -> List[Vector_Search_Result]:
+        await self.initialize()
+        if self.count == 0 or top_k <= 0:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        scores = self._matrix[: self._size] @ query
+        mask = self._alive[: self._size].copy()
+        if filter_dict:
+            for row in np.flatnonzero(mask):
+                if not match_metadata_filter(self._metadata[row], filter_dict):
+                    mask[row] = False
+        scores = np.where(mask, scores, -np.inf)
+
+        candidates = int(mask.sum())
+        k = min(top_k, candidates)
+        if k == 0:
+            return []
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")][:k]
+
+        results = [
+            Vector_Search_Result(
+                id=self._ids[row],
+                score=float(scores[row]),
+                metadata=dict(self._metadata[row]),
+            )
+            for row in top
+        ]
+        logger.info(f"NumPy search returned {len(results)} results")
+        return results
+
+    async def delete(self, ids: List[str]) -> None:
+        await self.initialize()
+        deleted = 0
+        for vec_id in ids:
+            row = self._id_to_row.pop(vec_id, None)
+            if row is None:
+                continue
+            self._alive[row] = False
+            self._matrix[row] = 0.0
+            self._ids[row] = None
+            self._metadata[row] = None
+            self._free_rows.append(row)
+            deleted += 1
+        logger.info(f"Deleted {deleted} vectors from NumPy store")
+        if deleted:
+            self._schedule_save()
+
+    async def fetch(self, ids: List[str]) -> Dict[str, List[float]]:
+        # rows are stored normalized, which is all cosine search needs
+        await self.initialize()
+        return {
+            vec_id: self._matrix[self._id_to_row[vec_id]].tolist()
+            for vec_id in ids
+            if vec_id in self._id_to_row
+        }
+
+    def _schedule_save(self) -> None:
+        if not self.persist_path:
+            return
+        self._dirty = True
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._save_when_idle())
+
+    async def _save_when_idle(self) -> None:
+        while self._dirty:
+            await asyncio.sleep(self.persist_delay)
+            self._dirty = False
+            try:
+                await self.save()
+            except Exception as e:
+                logger.error(f"Failed to persist NumPy store: {e}", exc_info=True)
+
+    async def close(self) -> None:
+        if self._save_task is not None and not self._save_task.done():
+            self._save_task.cancel()
+        if self._dirty or self._save_task is not None:
+            self._dirty = False
+            await self.save()
+
+    async def save(self) -> None:
+        if not self.persist_path:
+            return
+        # snapshot on the event loop, where all mutations happen
+        matrix = self._matrix[: self._size].copy()
+        alive = self._alive[: self._size].copy()
+        records = json.dumps({"ids": list(self._ids), "metadata": list(self._metadata)})
+        await asyncio.to_thread(self._write, matrix, alive, records)
+        logger.info(
+            f"Persisted NumPy store ({self.count} vectors) to {self.store_file}"
+        )
+
+    def _write(self, matrix: np.ndarray, alive: np.ndarray, records: str) -> None:
+        self.persist_path.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.store_file.with_suffix(".tmp")
+        with open(tmp_file, "wb") as f:
+            np.savez(f, vectors=matrix, alive=alive, records=np.array(records))
+        os.replace(tmp_file, self.store_file)
+
+    def _load(self) -> None:
+        with np.load(self.store_file) as data:
+            matrix, alive = data["vectors"], data["alive"]
+            records = json.loads(str(data["records"]))
+
+        self._size = matrix.shape[0]
+        self._matrix = np.zeros(
+            (max(self._size, self._matrix.shape[0]), self.dimension), dtype=np.float32
+        )
+        self._matrix[: self._size] = matrix
+        self._alive = np.zeros(self._matrix.shape[0], dtype=bool)
+        self._alive[: self._size] = alive
+        self._ids = records["ids"]
+        self._metadata = records["metadata"]
+        self._id_to_row = {
+            vec_id: row for row, vec_id in enumerate(self._ids) if vec_id is not None
+        }
+        self._free_rows = [row for row in range(self._size) if not alive[row]]
@@ -1,28 +1,80 @@
-from typing import List, Dict, Any, Tuple
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from pinecone import Pinecone, ServerlessSpec
 from app.services.vectore_store_adapters.base import (
     Base_Vector_Store,
     Vector_Search_Result,
 )
+from app.config import settings
 from app.logger import logger
 
+# The Pinecone SDK is synchronous; every call runs on this bounded pool so
+# the network round trip never blocks the event loop.
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_pinecone_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.pinecone_max_workers,
+            thread_name_prefix="pinecone",
+        )
+    return _executor
+
+
+def close_pinecone_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
 
 class Pinecone_Adapter(Base_Vector_Store):
-    def __init__(self, api_key: str, environment: str, index_name: str, dimension: int):
+    def __init__(
+        self,
+        api_key: str,
+        environment: str,
+        index_name: str,
+        dimension: int,
+        batch_size: int = 100,
+        upsert_parallelism: int = 4,
+        index_host: Optional[str] = None,
+    ):
         self.api_key = api_key
         self.environment = environment
         self.index_name = index_name
         self.dimension = dimension
+        self.batch_size = batch_size
+        self.upsert_parallelism = max(1, upsert_parallelism)
+        self.index_host = index_host
         self.pc = Pinecone(api_key=api_key)
         self.index = None
 
+    async def _run(self, fn: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_pinecone_executor(), partial(fn, *args, **kwargs)
+        )
+
     async def initialize(self) -> None:
+        if self.index is not None:
+            return
+        if self.index_host:
+            # a known host needs no control plane calls (and works with local fakes)
+            self.index = await self._run(self.pc.Index, host=self.index_host)
+            logger.info(f"Connected to Pinecone index at {self.index_host}")
+            return
+
         try:
-            existing_indexes = self.pc.list_indexes().names()
+            existing_indexes = (await self._run(self.pc.list_indexes)).names()
 
             if self.index_name not in existing_indexes:
                 logger.info(f"Creating Pinecone index: {self.index_name}")
-                self.pc.create_index(
+                await self._run(
+                    self.pc.create_index,
                     name=self.index_name,
                     dimension=self.dimension,
                     metric="cosine",
@@ -33,7 +85,7 @@ class Pinecone_Adapter(Base_Vector_Store):
                 logger.info(f"Pinecone index {self.index_name} already exists")
 
             # Connect to index
-            self.index = self.pc.Index(self.index_name)
+            self.index = await self._run(self.pc.Index, self.index_name)
 
         except Exception as e:
             logger.error(f"Failed to initialize Pinecone: {e}")
@@ -51,10 +103,17 @@ class Pinecone_Adapter(Base_Vector_Store):
                 (vec_id, values, metadata) for vec_id, values, metadata in vectors
             ]
 
-            batch_size = 100
-            for i in range(0, len(upsert_data), batch_size):
-                batch = upsert_data[i : i + batch_size]
-                self.index.upsert(vectors=batch)
+            batches = [
+                upsert_data[i : i + self.batch_size]
+                for i in range(0, len(upsert_data), self.batch_size)
+            ]
+            semaphore = asyncio.Semaphore(self.upsert_parallelism)
+
+            async def upsert_batch(batch):
+                async with semaphore:
+                    await self._run(self.index.upsert, vectors=batch)
+
+            await asyncio.gather(*(upsert_batch(batch) for batch in batches))
 
             logger.info(f"Upserted {len(vectors)} vectors to Pinecone")
 
@@ -81,7 +140,7 @@ class Pinecone_Adapter(Base_Vector_Store):
             if filter_dict:
                 query_params["filter"] = filter_dict
 
-            response = self.index.query(**query_params)
+            response = await self._run(self.index.query, **query_params)
 
             results = [
                 Vector_Search_Result(
@@ -102,9 +161,33 @@ class Pinecone_Adapter(Base_Vector_Store):
             await self.initialize()
 
         try:
-            self.index.delete(ids=ids)
+            await self._run(self.index.delete, ids=ids)
             logger.info(f"Deleted {len(ids)} vectors from Pinecone")
 
         except Exception as e:
             logger.error(f"Failed to delete from Pinecone: {e}")
             raise
+
+    async def fetch(self, ids: List[str]) -> Dict[str, List[float]]:
+        if not self.index:
+            await self.initialize()
+
+        try:
+            batches = [
+                ids[i : i + self.batch_size]
+                for i in range(0, len(ids), self.batch_size)
+            ]
+            responses = await asyncio.gather(
+                *(self._run(self.index.fetch, ids=batch) for batch in batches)
+            )
+            vectors = {
+                vec_id: list(vector.values)
+                for response in responses
+                for vec_id, vector in response.vectors.items()
+            }
+            logger.info(f"Fetched {len(vectors)} vectors from Pinecone")
+            return vectors
+
+        except Exception as e:
+            logger.error(f"Failed to fetch from Pinecone: {e}")
+            raise
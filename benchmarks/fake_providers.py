@@ -0,0 +1,308 @@
+"""
+Local stand-ins for the Cohere embed, Groq chat completions and Pinecone data plane APIs.
+
+Usage:
+    python -m benchmarks.fake_providers --port 9100
+    python -m benchmarks.fake_providers --latency cohere=40 groq=400 --error-rate groq=0.02
+
+Point the app at it with
+    COHERE_BASE_URL=http://127.0.0.1:9100/v1
+    GROQ_BASE_URL=http://127.0.0.1:9100/openai/v1
+    PINECONE_INDEX_HOST=http://127.0.0.1:9100
+
+Every provider sleeps for its latency (plus up to --jitter ms) before
+answering and fails a --error-rate fraction of requests with --error-status.
+Embeddings are hashed bags of words, so texts sharing words are similar and
+retrieval returns plausible matches.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+PROVIDERS = ("cohere", "groq", "pinecone")
+
+
+@dataclass
+class Fault_Config:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+
+
+@dataclass
+class Fake_Provider_Config:
+    dim: int = 1024
+    token_ms: float = 0.0
+    answer_tokens: int = 60
+    faults: Dict[str, Fault_Config] = field(
+        default_factory=lambda: {provider: Fault_Config() for provider in PROVIDERS}
+    )
+
+
+def embed(text: str, dim: int) -> np.ndarray:
+    vector = np.zeros(dim, dtype=np.float32)
+    for word in text.lower().split():
+        vector[zlib.crc32(word.encode("utf-8")) % dim] += 1.0
+    norm = np.linalg.norm(vector)
+    if not norm:
+        vector[0] = norm = 1.0
+    return vector / norm
+
+
+def matches_filter(metadata: Dict[str, Any], filter_dict: Dict[str, Any]) -> bool:
+    for key, condition in filter_dict.items():
+        value = metadata.get(key)
+        if isinstance(condition, dict):
+            if "$eq" in condition and value != condition["$eq"]:
+                return False
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class Fake_Index:
+    """Brute-force cosine index with Pinecone's upsert/query/fetch/delete semantics."""
+
+    def __init__(self):
+        self.vectors: Dict[str, np.ndarray] = {}
+        self.metadata: Dict[str, Dict[str, Any]] = {}
+
+    def upsert(self, vectors: List[Dict[str, Any]]) -> int:
+        for vector in vectors:
+            values = np.asarray(vector["values"], dtype=np.float32)
+            norm = np.linalg.norm(values)
+            self.vectors[vector["id"]] = values / norm if norm else values
+            self.metadata[vector["id"]] = vector.get("metadata") or {}
+        return len(vectors)
+
+    def query(
+        self,
+        vector: List[float],
+        top_k: int,
+        filter_dict: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        ids = [
+            vec_id
+            for vec_id in self.vectors
+            if not filter_dict or matches_filter(self.metadata[vec_id], filter_dict)
+        ]
+        if not ids:
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        scores = np.stack([self.vectors[vec_id] for vec_id in ids]) @ query
+        top = np.argsort(-scores)[:top_k]
+        return [
+            {"id": ids[i], "score": float(scores[i]), "metadata": self.metadata[ids[i]]}
+            for i in top
+        ]
+
+    def fetch(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        return {
+            vec_id: {
+                "id": vec_id,
+                "values": self.vectors[vec_id].tolist(),
+                "metadata": self.metadata[vec_id],
+            }
+            for vec_id in ids
+            if vec_id in self.vectors
+        }
+
+    def delete(self, ids: List[str]) -> None:
+        for vec_id in ids:
+            self.vectors.pop(vec_id, None)
+            self.metadata.pop(vec_id, None)
+
+
+def create_app(config: Fake_Provider_Config) -> FastAPI:
+    app = FastAPI(title="Fake providers")
+    index = Fake_Index()
+    rng = random.Random()
+
+    async def inject(provider: str) -> None:
+        fault = config.faults[provider]
+        delay = fault.latency_ms + rng.uniform(0, fault.jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        if rng.random() < fault.error_rate:
+            raise HTTPException(
+                status_code=fault.error_status, detail=f"injected {provider} failure"
+            )
+
+    @app.post("/v1/embed")
+    async def cohere_embed(body: Dict[str, Any]):
+        await inject("cohere")
+        embeddings = [embed(text, config.dim).tolist() for text in body["texts"]]
+        return {
+            "id": f"fake-{time.time_ns()}",
+            "texts": body["texts"],
+            "embeddings": {"float": embeddings},
+            "meta": {"billed_units": {"input_tokens": 0}},
+        }
+
+    @app.post("/openai/v1/chat/completions")
+    async def groq_chat(body: Dict[str, Any]):
+        await inject("groq")
+        messages = body.get("messages") or []
+        system = messages[0].get("content", "") if messages else ""
+        if "JSON extraction" in system:
+            answer = "{}"
+        else:
+            question = messages[-1].get("content", "") if messages else ""
+            words = (question.split() or ["ok"]) * config.answer_tokens
+            answer = " ".join(
+                ["Fake", "answer:"] + words[: max(0, config.answer_tokens - 2)]
+            )
+
+        if not body.get("stream"):
+            return {
+                "id": f"fake-{time.time_ns()}",
+                "object": "chat.completion",
+                "model": body.get("model"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": answer},
+                        "finish_reason": "stop",
+                    }
+                ],
+            }
+
+        async def events():
+            for token in answer.split(" "):
+                if config.token_ms:
+                    await asyncio.sleep(config.token_ms / 1000)
+                chunk = {"choices": [{"index": 0, "delta": {"content": token + " "}}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/vectors/upsert")
+    async def pinecone_upsert(body: Dict[str, Any]):
+        await inject("pinecone")
+        return {"upsertedCount": index.upsert(body.get("vectors") or [])}
+
+    @app.post("/query")
+    async def pinecone_query(body: Dict[str, Any]):
+        await inject("pinecone")
+        matches = index.query(body["vector"], body.get("topK", 10), body.get("filter"))
+        return {"matches": matches, "namespace": body.get("namespace", "")}
+
+    @app.get("/vectors/fetch")
+    async def pinecone_fetch(ids: List[str] = Query(default=[]), namespace: str = ""):
+        await inject("pinecone")
+        return {"vectors": index.fetch(ids), "namespace": namespace}
+
+    @app.post("/vectors/delete")
+    async def pinecone_delete(request: Request):
+        await inject("pinecone")
+        body = await request.json()
+        index.delete(body.get("ids") or [])
+        return {}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "vectors": len(index.vectors)}
+
+    return app
+
+
+def parse_overrides(pairs: List[str], cast=float) -> Dict[str, Any]:
+    """`cohere=40 groq=400` -> {"cohere": 40.0, "groq": 400.0}; a bare value applies to all."""
+    values = {}
+    for pair in pairs or []:
+        provider, _, value = pair.rpartition("=")
+        targets = [provider] if provider else PROVIDERS
+        for target in targets:
+            if target not in PROVIDERS:
+                raise ValueError(f"Unknown provider {target!r} in {pair!r}")
+            values[target] = cast(value)
+    return values
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--latency", nargs="*", default=[], help="ms per provider, e.g. groq=400"
+    )
+    parser.add_argument("--jitter", nargs="*", default=[], help="extra random ms")
+    parser.add_argument(
+        "--error-rate", nargs="*", default=[], help="failing fraction, e.g. cohere=0.05"
+    )
+    parser.add_argument(
+        "--error-status", nargs="*", default=[], help="status of injected failures"
+    )
+    parser.add_argument("--token-ms", type=float, default=0.0)
+    parser.add_argument("--answer-tokens", type=int, default=60)
+    parser.add_argument("--dim", type=int, default=1024)
+
+
+def fault_cli_args(args: argparse.Namespace) -> List[str]:
+    """The add_fault_arguments options of args, to forward to a fake server process."""
+    forwarded = [
+        "--token-ms",
+        str(args.token_ms),
+        "--answer-tokens",
+        str(args.answer_tokens),
+        "--dim",
+        str(args.dim),
+    ]
+    for option in ("latency", "jitter", "error_rate", "error_status"):
+        values = getattr(args, option)
+        if values:
+            forwarded += [f"--{option.replace('_', '-')}", *values]
+    return forwarded
+
+
+def config_from_args(args: argparse.Namespace) -> Fake_Provider_Config:
+    latency = parse_overrides(args.latency)
+    jitter = parse_overrides(args.jitter)
+    error_rate = parse_overrides(args.error_rate)
+    error_status = parse_overrides(args.error_status, int)
+    return Fake_Provider_Config(
+        dim=args.dim,
+        token_ms=args.token_ms,
+        answer_tokens=args.answer_tokens,
+        faults={
+            provider: Fault_Config(
+                latency_ms=latency.get(provider, 0.0),
+                jitter_ms=jitter.get(provider, 0.0),
+                error_rate=error_rate.get(provider, 0.0),
+                error_status=error_status.get(provider, 503),
+            )
+            for provider in PROVIDERS
+        },
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_app(config_from_args(args)),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Recall-versus-latency report for the HNSW index against exact search.
+
+Usage:
+    python -m benchmarks.hnsw_recall --vectors 20000 --dim 256 --queries 200
+    python -m benchmarks.hnsw_recall --ef-search 16 32 64 128 --output hnsw.json
+"""
+
+import argparse
+import json
+import time
+from typing import List
+
+import numpy as np
+
+from app.services.vectore_store_adapters.hnsw_adapter import HNSW_Index
+
+
+def make_dataset(
+    n: int, dim: int, clusters: int, seed: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Clustered unit vectors, closer to real embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    assignment = rng.integers(0, clusters, size=n)
+    data = centers[assignment] + 0.35 * rng.normal(size=(n, dim)).astype(np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    return data, centers
+
+
+def percentile_ms(samples: List[float], q: float) -> float:
+    return float(np.percentile(samples, q) * 1000)
+
+
+def run(args: argparse.Namespace) -> dict:
+    data, _ = make_dataset(args.vectors, args.dim, args.clusters, args.seed)
+    rng = np.random.default_rng(args.seed + 1)
+    query_idx = rng.choice(len(data), size=args.queries, replace=False)
+    queries = data[query_idx] + 0.1 * rng.normal(size=(args.queries, args.dim))
+    queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(
+        np.float32
+    )
+
+    index = HNSW_Index(
+        args.dim, m=args.m, ef_construction=args.ef_construction, seed=args.seed
+    )
+    start = time.perf_counter()
+    index.insert(data, list(range(len(data))))
+    build_seconds = time.perf_counter() - start
+
+    exact_latency, truth = [], []
+    for query in queries:
+        t0 = time.perf_counter()
+        scores = data @ query
+        top = np.argpartition(-scores, args.k - 1)[: args.k]
+        exact_latency.append(time.perf_counter() - t0)
+        truth.append(set(top.tolist()))
+
+    report = {
+        "vectors": args.vectors,
+        "dim": args.dim,
+        "queries": args.queries,
+        "k": args.k,
+        "m": args.m,
+        "ef_construction": args.ef_construction,
+        "build_seconds": round(build_seconds, 3),
+        "exact": {
+            "p50_ms": round(percentile_ms(exact_latency, 50), 4),
+            "p95_ms": round(percentile_ms(exact_latency, 95), 4),
+        },
+        "hnsw": [],
+    }
+
+    for ef in args.ef_search:
+        latency, hits = [], 0
+        for query, expected in zip(queries, truth):
+            t0 = time.perf_counter()
+            found = index.search(query, args.k, ef=ef)
+            latency.append(time.perf_counter() - t0)
+            hits += len(expected.intersection(node for _, node in found))
+        report["hnsw"].append(
+            {
+                "ef_search": ef,
+                "recall": round(hits / (args.k * args.queries), 4),
+                "p50_ms": round(percentile_ms(latency, 50), 4),
+                "p95_ms": round(percentile_ms(latency, 95), 4),
+            }
+        )
+    return report
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"{report['vectors']} vectors x {report['dim']} dims, "
+        f"M={report['m']}, ef_construction={report['ef_construction']}, "
+        f"built in {report['build_seconds']}s"
+    )
+    print(
+        f"exact search: p50 {report['exact']['p50_ms']} ms, "
+        f"p95 {report['exact']['p95_ms']} ms"
+    )
+    print(
+        f"{'ef_search':>10} {'recall@' + str(report['k']):>10} {'p50 ms':>10} {'p95 ms':>10}"
+    )
+    for row in report["hnsw"]:
+        print(
+            f"{row['ef_search']:>10} {row['recall']:>10} "
+            f"{row['p50_ms']:>10} {row['p95_ms']:>10}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vectors", type=int, default=10000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--clusters", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument(
+        "--ef-search", type=int, nargs="+", default=[16, 32, 64, 128, 256]
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = run(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Throughput and peak memory of chunking and PDF extraction on synthetic corpora.
+
+Usage:
+    python -m benchmarks.ingestion_throughput --sizes 0.1 1 10 --pdf-pages 10 100
+    python -m benchmarks.ingestion_throughput --output run.json --baseline main.json
+
+Corpora are generated from a fixed seed, so runs with the same arguments
+chunk exactly the same text. With --baseline, cases whose throughput fell by
+more than --max-regression exit with status 1.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List
+
+from app.models.schemas import (
+    Content_Defined_Chunk_Config,
+    Fixed_length_Chunk_Config,
+    Semantic_Chunk_Config,
+)
+from app.services.chunking import get_chunker
+from app.services.pdf_extractor import (
+    close_pdf_executor,
+    extract_page_range,
+    extract_text_from_pdf_file,
+)
+
+CHUNKERS = {
+    "fixed_len": Fixed_length_Chunk_Config(chunk_size=500, chunk_overlap=50),
+    "semantic_sentence": Semantic_Chunk_Config(split_by="sentence"),
+    "semantic_paragraph": Semantic_Chunk_Config(split_by="paragraph"),
+    "content_defined": Content_Defined_Chunk_Config(),
+}
+
+WORDS = (
+    "candidate interview role team salary remote office engineer python service "
+    "deadline schedule manager review offer contract benefit project skills data "
+    "platform design system release customer support process hiring onboarding"
+).split()
+
+PAGE_CHARS = 3000
+LINE_CHARS = 90
+
+
+def make_corpus(size_bytes: int, seed: int) -> str:
+    """Paragraphs of sentences of varying length, roughly size_bytes long."""
+    rng = random.Random(seed)
+    paragraphs = []
+    total = 0
+    while total < size_bytes:
+        sentences = []
+        for _ in range(rng.randint(1, 12)):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(4, 30))]
+            sentences.append(" ".join(words).capitalize() + rng.choice(".!?"))
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        total += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: List[str]) -> bytes:
+    """A minimal PDF with one Helvetica text stream per page."""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages))), len(pages)
+        ),
+    ]
+    font = 3 + 2 * len(pages)
+    for i, page in enumerate(pages):
+        lines = [
+            page[start : start + LINE_CHARS]
+            for start in range(0, len(page), LINE_CHARS)
+        ]
+        stream = "BT /F1 9 Tf 11 TL 36 756 Td {} ET".format(
+            " ".join(f"({_pdf_escape(line)}) Tj T*" for line in lines)
+        )
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font} 0 R >> >> /Contents {4 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode()
+    return bytes(out)
+
+
+def measure(fn: Callable[[], int], repeat: int) -> dict:
+    """Median wall time over `repeat` runs, then one traced run for peak memory."""
+    # warm-up: imports, regex caches and pool processes are not what we measure
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = fn()
+        timings.append(time.perf_counter() - start)
+
+    # tracing slows allocation down, so it gets its own run
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "count": count,
+        "seconds": statistics.median(timings),
+        "peak_mb": round(peak / 1e6, 3),
+    }
+
+
+def bench_chunkers(sizes_mb: List[float], repeat: int, seed: int) -> List[dict]:
+    results = []
+    for size_mb in sizes_mb:
+        text = make_corpus(int(size_mb * 1e6), seed)
+        text_mb = len(text.encode("utf-8")) / 1e6
+        for name, config in CHUNKERS.items():
+            chunker = get_chunker(config)
+            stats = measure(lambda: sum(1 for _ in chunker.iter_spans(text)), repeat)
+            results.append(
+                {
+                    "case": f"chunk/{name}/{size_mb}MB",
+                    "chunker": name,
+                    "input_mb": round(text_mb, 3),
+                    "chunks": stats["count"],
+                    "seconds": round(stats["seconds"], 4),
+                    "mb_per_s": round(text_mb / stats["seconds"], 2),
+                    "chunks_per_s": round(stats["count"] / stats["seconds"], 1),
+                    "peak_mb": stats["peak_mb"],
+                }
+            )
+    return results
+
+
+def bench_pdf(page_counts: List[int], repeat: int, seed: int) -> List[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in page_counts:
+            text = make_corpus(pages * PAGE_CHARS, seed)
+            page_texts = [
+                text[start : start + PAGE_CHARS]
+                for start in range(0, pages * PAGE_CHARS, PAGE_CHARS)
+            ]
+            path = Path(tmp) / f"corpus_{pages}.pdf"
+            path.write_bytes(make_pdf(page_texts))
+            file_mb = path.stat().st_size / 1e6
+
+            # one process, what a single pool worker sustains
+            serial = measure(
+                lambda: len(extract_page_range(str(path), 0, pages, True)[0]),
+                repeat,
+            )
+            # the ingestion path; tracemalloc only sees this process
+            pooled = measure(
+                lambda: len(asyncio.run(extract_text_from_pdf_file(str(path)))),
+                repeat,
+            )
+            for mode, stats in (("serial", serial), ("pool", pooled)):
+                results.append(
+                    {
+                        "case": f"pdf/{mode}/{pages}p",
+                        "mode": mode,
+                        "pages": pages,
+                        "input_mb": round(file_mb, 3),
+                        "seconds": round(stats["seconds"], 4),
+                        "mb_per_s": round(file_mb / stats["seconds"], 2),
+                        "pages_per_s": round(pages / stats["seconds"], 1),
+                        "peak_mb": stats["peak_mb"],
+                    }
+                )
+    close_pdf_executor()
+    return results
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> List[str]:
+    """Cases whose MB/s dropped by more than max_regression against baseline."""
+    previous = {row["case"]: row for row in baseline.get("results", [])}
+    regressions = []
+    for row in report["results"]:
+        before = previous.get(row["case"])
+        if before is None:
+            continue
+        change = row["mb_per_s"] / before["mb_per_s"] - 1
+        row["change_vs_baseline"] = round(change, 3)
+        if change < -max_regression:
+            regressions.append(
+                f"{row['case']}: {before['mb_per_s']} -> {row['mb_per_s']} MB/s "
+                f"({change:+.1%})"
+            )
+    return regressions
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"{'case':<36} {'MB/s':>9} {'chunks/s':>11} {'pages/s':>9} "
+        f"{'peak MB':>9} {'change':>8}"
+    )
+    for row in report["results"]:
+        change = row.get("change_vs_baseline")
+        print(
+            f"{row['case']:<36} {row['mb_per_s']:>9} "
+            f"{row.get('chunks_per_s', '-'):>11} {row.get('pages_per_s', '-'):>9} "
+            f"{row['peak_mb']:>9} "
+            f"{'-' if change is None else f'{change:+.1%}':>8}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes", type=float, nargs="+", default=[0.1, 1, 5], help="Corpus MB"
+    )
+    parser.add_argument("--pdf-pages", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--skip-pdf", action="store_true")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.2,
+        help="Allowed MB/s drop against the baseline (0.2 = 20%%)",
+    )
+    args = parser.parse_args()
+
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "results": bench_chunkers(args.sizes, args.repeat, args.seed),
+    }
+    if not args.skip_pdf:
+        report["results"] += bench_pdf(args.pdf_pages, args.repeat, args.seed)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if regressions:
+        print("\nRegressions beyond the allowed threshold:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""
+Load test /api/chat and /api/ingest against fake Cohere, Groq and Pinecone servers.
+
+Usage:
+    python -m benchmarks.load_test --concurrency 1 8 32 --duration 20
+    python -m benchmarks.load_test --scenarios chat --latency groq=400 --error-rate cohere=0.02
+    python -m benchmarks.load_test --target http://127.0.0.1:8000 --no-fakes --output run.json
+
+By default the fake providers (benchmarks.fake_providers) and the app
+(uvicorn main:app) are started as subprocesses, with the app's provider URLs
+pointed at the fakes. Postgres and Redis must be reachable as usual. Each
+concurrency level runs closed-loop workers for --duration seconds and reports
+p50/p95/p99 latency, throughput and error rate per scenario.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+from uuid import uuid4
+
+import httpx
+import numpy as np
+
+from benchmarks.fake_providers import add_fault_arguments, fault_cli_args
+from benchmarks.ingestion_throughput import make_corpus
+
+QUERIES = [
+    "What roles are you hiring for?",
+    "What are the responsibilities of the backend engineer position?",
+    "Which skills does the job description ask for?",
+    "Is the position remote or in the office?",
+    "What does the interview process look like?",
+    "What benefits come with the offer?",
+]
+
+SAMPLE_DOCUMENT = Path(__file__).resolve().parent.parent / "app" / "sample_document.txt"
+
+
+@dataclass
+class Level_Result:
+    latencies: List[float] = field(default_factory=list)
+    outcomes: Counter = field(default_factory=Counter)
+    errors: int = 0
+
+    def record(self, seconds: float, outcome: str, ok: bool) -> None:
+        self.latencies.append(seconds)
+        self.outcomes[outcome] += 1
+        if not ok:
+            self.errors += 1
+
+
+class Scenario(ABC):
+    """prepare() builds a request outside the timed section, send() is timed."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+
+    def prepare(self, number: int) -> Any:
+        return number
+
+    @abstractmethod
+    async def send(
+        self, client: httpx.AsyncClient, payload: Any
+    ) -> tuple[str, bool]: ...
+
+
+class Chat_Scenario(Scenario):
+    def prepare(self, number: int) -> dict:
+        query = QUERIES[number % len(QUERIES)]
+        if self.args.unique_queries:
+            # defeats the embedding and answer caches
+            query = f"{query} (request {number})"
+        return {"query": query, "session_id": str(uuid4())}
+
+    async def send(self, client: httpx.AsyncClient, payload: dict) -> tuple[str, bool]:
+        response = await client.post("/api/chat", json=payload)
+        return str(response.status_code), response.is_success
+
+
+class Ingest_Scenario(Scenario):
+    def prepare(self, number: int) -> tuple[str, bytes]:
+        # a distinct seed per request, so uploads are never deduplicated
+        text = make_corpus(
+            self.args.ingest_kb * 1000, seed=self.args.seed * 1_000_003 + number
+        )
+        return f"load_{number}.txt", text.encode("utf-8")
+
+    async def send(
+        self, client: httpx.AsyncClient, payload: tuple[str, bytes]
+    ) -> tuple[str, bool]:
+        filename, content = payload
+        response = await client.post(
+            "/api/ingest",
+            files={"file": (filename, content, "text/plain")},
+            data={"chunking_type": self.args.chunking_type},
+        )
+        if not response.is_success or not self.args.ingest_wait:
+            return str(response.status_code), response.is_success
+
+        status = await wait_for_job(
+            client, response.json()["job_id"], self.args.timeout
+        )
+        return f"job_{status}", status == "completed"
+
+
+async def wait_for_job(client: httpx.AsyncClient, job_id: str, timeout: float) -> str:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = await client.get(f"/api/ingest/{job_id}")
+        if response.is_success:
+            status = response.json()["status"]
+            if status in ("completed", "failed"):
+                return status
+        await asyncio.sleep(0.1)
+    return "timeout"
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    concurrency: int,
+    duration: float,
+) -> tuple[Level_Result, float]:
+    result = Level_Result()
+    counter = iter(range(sys.maxsize))
+    started = time.perf_counter()
+    deadline = started + duration
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            payload = scenario.prepare(next(counter))
+            t0 = time.perf_counter()
+            try:
+                outcome, ok = await scenario.send(client, payload)
+            except httpx.HTTPError as e:
+                outcome, ok = type(e).__name__, False
+            result.record(time.perf_counter() - t0, outcome, ok)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return result, time.perf_counter() - started
+
+
+def summarize(
+    scenario: str, concurrency: int, result: Level_Result, elapsed: float
+) -> dict:
+    requests = len(result.latencies)
+    latencies = np.asarray(result.latencies or [0.0]) * 1000
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": result.errors,
+        "error_rate": round(result.errors / requests, 4) if requests else 0.0,
+        "throughput_rps": round(requests / elapsed, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 1),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 1),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 1),
+        "outcomes": dict(result.outcomes),
+    }
+
+
+def start_process(command: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(command, env={**os.environ, **env})
+
+
+async def wait_ready(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).is_success:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+
+def app_environment(args: argparse.Namespace) -> Dict[str, str]:
+    fake = f"http://127.0.0.1:{args.fake_port}"
+    env = {
+        "COHERE_API_KEY": "fake",
+        "COHERE_BASE_URL": f"{fake}/v1",
+        "GROQ_API_KEY": "fake",
+        "GROQ_BASE_URL": f"{fake}/openai/v1",
+        "VECTOR_STORE_TYPE": "pinecone",
+        "PINECONE_API_KEY": "fake",
+        "PINECONE_ENVIRONMENT": "local",
+        "PINECONE_INDEX_HOST": fake,
+        "EMBEDDING_DIM": str(args.dim),
+    }
+    for pair in args.app_env:
+        key, _, value = pair.partition("=")
+        env[key] = value
+    return env
+
+
+async def seed_documents(client: httpx.AsyncClient, args: argparse.Namespace) -> None:
+    """Give chat something to retrieve before it is measured."""
+    text = (
+        SAMPLE_DOCUMENT.read_text(encoding="utf-8")
+        if SAMPLE_DOCUMENT.exists()
+        else make_corpus(20_000, args.seed)
+    )
+    response = await client.post(
+        "/api/ingest",
+        files={"file": ("load_test_seed.txt", text.encode("utf-8"), "text/plain")},
+        data={"chunking_type": args.chunking_type},
+    )
+    response.raise_for_status()
+    status = await wait_for_job(client, response.json()["job_id"], args.timeout)
+    print(f"seed document: {status}")
+
+
+async def run(args: argparse.Namespace) -> dict:
+    scenarios = {"chat": Chat_Scenario(args), "ingest": Ingest_Scenario(args)}
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "target": args.target,
+        "duration": args.duration,
+        "faults": None if args.no_fakes else fault_cli_args(args),
+        "results": [],
+    }
+
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+    async with httpx.AsyncClient(
+        base_url=args.target, timeout=args.timeout, limits=limits
+    ) as client:
+        if "chat" in args.scenarios and args.seed_document:
+            await seed_documents(client, args)
+
+        for name in args.scenarios:
+            for concurrency in args.concurrency:
+                result, elapsed = await run_level(
+                    client, scenarios[name], concurrency, args.duration
+                )
+                row = summarize(name, concurrency, result, elapsed)
+                report["results"].append(row)
+                print_row(row)
+    return report
+
+
+def print_header() -> None:
+    print(
+        f"{'scenario':<8} {'conc':>5} {'reqs':>7} {'rps':>8} {'p50 ms':>9} "
+        f"{'p95 ms':>9} {'p99 ms':>9} {'errors':>7}"
+    )
+
+
+def print_row(row: dict) -> None:
+    print(
+        f"{row['scenario']:<8} {row['concurrency']:>5} {row['requests']:>7} "
+        f"{row['throughput_rps']:>8} {row['p50_ms']:>9} {row['p95_ms']:>9} "
+        f"{row['p99_ms']:>9} {row['error_rate']:>7.2%}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=["chat", "ingest"], default=["chat", "ingest"]
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument(
+        "--duration", type=float, default=20.0, help="Seconds per level"
+    )
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument(
+        "--unique-queries",
+        action="store_true",
+        help="Make every chat query distinct so caches never hit",
+    )
+    parser.add_argument(
+        "--ingest-kb", type=int, default=50, help="Size of each uploaded document"
+    )
+    parser.add_argument("--chunking-type", default="fixed_len")
+    parser.add_argument(
+        "--ingest-wait",
+        action="store_true",
+        help="Time ingestion until the job finishes instead of until it is queued",
+    )
+    parser.add_argument(
+        "--no-seed-document",
+        dest="seed_document",
+        action="store_false",
+        help="Skip ingesting a document before the chat scenario",
+    )
+    parser.add_argument("--target", default=None, help="Use an already running app")
+    parser.add_argument("--app-port", type=int, default=8100)
+    parser.add_argument("--app-workers", type=int, default=1)
+    parser.add_argument(
+        "--app-env", nargs="*", default=[], help="Extra KEY=VALUE settings for the app"
+    )
+    parser.add_argument("--fake-port", type=int, default=9100)
+    parser.add_argument(
+        "--no-fakes",
+        action="store_true",
+        help="Don't start fake providers (the target brings its own)",
+    )
+    add_fault_arguments(parser)
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    processes = []
+    try:
+        if not args.no_fakes:
+            processes.append(
+                start_process(
+                    [
+                        sys.executable,
+                        "-m",
+                        "benchmarks.fake_providers",
+                        "--port",
+                        str(args.fake_port),
+                        *fault_cli_args(args),
+                    ],
+                    {},
+                )
+            )
+            asyncio.run(wait_ready(f"http://127.0.0.1:{args.fake_port}/health"))
+
+        if args.target is None:
+            args.target = f"http://127.0.0.1:{args.app_port}"
+            processes.append(
+                start_process(
+                    [
+                        sys.executable,
+                        "-m",
+                        "uvicorn",
+                        "main:app",
+                        "--port",
+                        str(args.app_port),
+                        "--workers",
+                        str(args.app_workers),
+                        "--log-level",
+                        "warning",
+                    ],
+                    app_environment(args),
+                )
+            )
+            asyncio.run(wait_ready(f"{args.target}/"))
+
+        print_header()
+        report = asyncio.run(run(args))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=30)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
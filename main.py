@@ -6,8 +6,23 @@ from app.api.ingestion import router as ingestion_router
 from app.api.rag import router as rag_router
 from app.db.base import init_db
 from app.services.chat_history import close_redis_client
+from app.services.http_client import init_http_clients, close_http_clients
+from app.services.vectore_store_adapters import (
+    get_vector_store,
+    close_vector_store,
+    close_pinecone_executor,
+)
+from app.services.embed import get_embedding_client
+from app.services.LLM import get_llm_client
+from app.services.pdf_extractor import get_pdf_executor, close_pdf_executor
+from app.services.ingestion_jobs import (
+    start_ingestion_workers,
+    stop_ingestion_workers,
+)
 from app.config import settings
 from app.logger import logger
+from app.metrics import Metrics_Middleware, metrics_response
+from app.services.upload_storage import Upload_Limit_Middleware
 from app.models.schemas import HealthCheckResponse
 
 
@@ -15,7 +30,7 @@ from app.models.schemas import HealthCheckResponse
 async def lifespan(app: FastAPI):
     logger.info("Starting application...")
     logger.info(f"Environment: {settings.app_name} v{settings.app_version}")
-    logger.info(f"Vector Store: Pinecone")
+    logger.info(f"Vector Store: {settings.vector_store_type}")
     logger.info(f"Embedding Provider: {settings.embedding_provider}")
     logger.info(f"LLM Provider: {settings.llm_provider}")
 
@@ -26,12 +41,38 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to initialize database: {e}")
         raise
 
+    await init_http_clients()
+    logger.info("HTTP client pools initialized")
+
+    # Build and warm shared services once; a failure here is retried lazily
+    # by the request dependencies so a missing key only breaks its own routes.
+    for name, init_service in (
+        ("vector store", get_vector_store),
+        ("embedding client", get_embedding_client),
+        ("LLM client", get_llm_client),
+    ):
+        try:
+            await init_service()
+            logger.info(f"Initialized {name}")
+        except Exception as e:
+            logger.error(f"Failed to initialize {name}: {e}")
+
+    # create the extraction pool before workers can hand it PDFs
+    get_pdf_executor()
+    await start_ingestion_workers()
+
     logger.info("Application startup complete")
 
     yield
 
     logger.info("Shutting down application...")
+    # workers hand unfinished jobs back to Redis, so stop them first
+    await stop_ingestion_workers()
     await close_redis_client()
+    await close_vector_store()
+    await close_http_clients()
+    close_pinecone_executor()
+    close_pdf_executor()
     logger.info("Application shutdown complete")
 
 
@@ -55,9 +96,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(Upload_Limit_Middleware)
+app.add_middleware(Metrics_Middleware)
+
 app.include_router(ingestion_router)
 app.include_router(rag_router)
 
+if settings.metrics_enabled:
+    app.add_api_route(
+        "/metrics", metrics_response, methods=["GET"], include_in_schema=False
+    )
+
 
 @app.get("/", response_model=HealthCheckResponse)
 async def root():
@@ -67,7 +116,7 @@ async def root():
         services={
             "database": "postgresql",
             "cache": "redis",
-            "vector_store": "pinecone",
+            "vector_store": settings.vector_store_type,
             "embedding": settings.embedding_provider,
             "llm": settings.llm_provider,
         },
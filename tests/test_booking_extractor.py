@@ -0,0 +1,49 @@
+from datetime import date
+
+import pytest
+
+from app.services.booking_extractor import extract_booking_locally
+
+TODAY = date(2026, 1, 5)
+
+
+@pytest.mark.parametrize(
+    "text, name, complete",
+    [
+        # a month word in front of a name could be either: leave it to the LLM
+        ("Schedule with May Lin may@lin.com May 5 at 3 pm", None, False),
+        ("book interview for April Jones april@x.com tomorrow 3pm", None, False),
+        # text right before an email isn't necessarily a name
+        ("Hi I am a Senior Engineer, john@x.com, tomorrow 3pm", None, False),
+        ("Thanks! Reach Me at jdoe@x.com, tomorrow 3pm works", None, False),
+        ("Jane Doe jane@x.com tomorrow 3pm", None, False),
+        ("I am Interested in the role, tomorrow 3pm", None, False),
+        # a month followed by a day is a date, not part of a name
+        (
+            "My name is Jane Doe, jane@x.com, book me for May 5 at 3 pm",
+            "Jane Doe",
+            True,
+        ),
+        (
+            "Book an interview for John Smith, john@x.com, tomorrow at 3pm",
+            "John Smith",
+            True,
+        ),
+        ("I'm Priya Patel, priya@x.com, next Monday at 10:30", "Priya Patel", True),
+        (
+            "My name is Jane. Schedule an interview with Jane Doe, jane@x.com, "
+            "tomorrow at noon",
+            "Jane Doe",
+            True,
+        ),
+        (
+            "My name is Jane Doe, schedule with John Smith, jane@x.com tomorrow 3pm",
+            None,
+            False,
+        ),
+    ],
+)
+def test_extract_name(text, name, complete):
+    result = extract_booking_locally(text, today=TODAY)
+    assert result.name == name
+    assert result.is_complete is complete